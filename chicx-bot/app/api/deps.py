@@ -1,5 +1,6 @@
 """API dependencies for dependency injection."""
 
+import hmac
 import logging
 from typing import Annotated
 
@@ -45,7 +46,7 @@ async def verify_bolna_webhook(
         logger.warning("Bolna webhook request missing X-Bolna-Secret header")
         raise HTTPException(status_code=401, detail="Missing authentication header")
 
-    if x_bolna_secret != settings.bolna_webhook_secret:
+    if not hmac.compare_digest(x_bolna_secret.encode(), settings.bolna_webhook_secret_bytes):
         logger.warning("Bolna webhook request with invalid secret")
         raise HTTPException(status_code=401, detail="Invalid authentication")
 
@@ -73,7 +74,7 @@ async def verify_admin_api_key(
         logger.warning("Admin API request missing X-API-Key header")
         raise HTTPException(status_code=401, detail="Missing API key")
 
-    if x_api_key != settings.admin_api_key:
+    if not hmac.compare_digest(x_api_key.encode(), settings.admin_api_key_bytes):
         logger.warning("Admin API request with invalid API key")
         raise HTTPException(status_code=401, detail="Invalid API key")
 
@@ -11,23 +11,31 @@ This is the sole source of truth for voice call data.
 Reference: https://docs.bolna.dev
 """
 
+import hashlib
+import json
 import logging
+import uuid
+from collections.abc import Awaitable, Callable
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, cast
 
-from fastapi import APIRouter, Depends, Request
-from pydantic import BaseModel
+import orjson
+from fastapi import APIRouter, Depends, Request, Response
+from pydantic import BaseModel, TypeAdapter
 import redis.asyncio as aioredis
-from sqlalchemy import select
+from sqlalchemy import CursorResult, insert, lambda_stmt, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.db.session import get_db
 from app.api.deps import BolnaAuth
+from app.core.tools import ToolName
 from app.models.voice import Call, CallTranscript, CallStatus, CallDirection
 from app.models.conversation import Conversation, ChannelType, ConversationStatus
 from app.models.user import User
 from app.services.chicx_api import get_chicx_client, ChicxAPIError
+from app.utils.idempotency import once, release
 from app.utils.phone import normalize_phone
 from app.services.embedding import EmbeddingService
 
@@ -36,6 +44,35 @@ router = APIRouter(prefix="/webhooks/bolna", tags=["Voice"])
 
 settings = get_settings()
 
+# FAQ answer cache - voice callers repeat the same few questions
+FAQ_CACHE_PREFIX = "faq:v1"  # Bump the version to invalidate after FAQs change
+FAQ_CACHE_TTL_SECONDS = 24 * 60 * 60  # 1 day
+
+# Segment count already stored per call, for append-only transcript updates
+TRANSCRIPT_SEGMENTS_TTL_SECONDS = 24 * 60 * 60  # 1 day
+
+# Keywords used to read the customer's answer from a confirmation call transcript
+CONFIRMATION_POSITIVE_KEYWORDS = (
+    "yes", "confirm", "haan", "theek", "ok", "okay", "proceed", "correct", "sure",
+)
+CONFIRMATION_NEGATIVE_KEYWORDS = ("no", "cancel", "nahi", "wrong", "incorrect", "stop", "reject")
+
+# Bolna call status -> CallStatus; unknown statuses default to RESOLVED
+BOLNA_STATUS_MAP: dict[str, CallStatus] = {
+    "completed": CallStatus.RESOLVED,
+    "resolved": CallStatus.RESOLVED,
+    "escalated": CallStatus.ESCALATED,
+    "transferred": CallStatus.ESCALATED,
+    "failed": CallStatus.FAILED,
+    "error": CallStatus.FAILED,
+    "missed": CallStatus.MISSED,
+    "no-answer": CallStatus.MISSED,
+    "busy": CallStatus.MISSED,
+}
+
+# Health body never changes - serialize it once for load balancer polling
+_HEALTH_BYTES = orjson.dumps({"status": "ok", "service": "bolna-webhook"})
+
 
 # =============================================================================
 # Request/Response Models
@@ -50,6 +87,10 @@ class TranscriptSegment(BaseModel):
     end_time: float
 
 
+# Serializes a whole segment list in one pydantic-core call
+_SEGMENTS_ADAPTER = TypeAdapter(list[TranscriptSegment])
+
+
 class TranscriptPayload(BaseModel):
     """Transcript webhook payload from Bolna."""
     call_id: str
@@ -103,47 +144,114 @@ class CallCompletePayload(BaseModel):
 
 
 @router.get("/health")
-async def health() -> dict[str, str]:
+async def health() -> Response:
     """Health check for Bolna webhook."""
-    return {"status": "ok", "service": "bolna-webhook"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 
 @router.post("/transcript")
 async def handle_transcript(
     payload: TranscriptPayload,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     _auth: BolnaAuth = None,
 ) -> dict[str, str]:
     """Handle transcription result from Bolna.
 
     Called when a segment of transcription is ready during or after a call.
+
+    Bolna resends the full segment list on every webhook. The number of
+    segments already stored is tracked in Redis, so updates append only the
+    new segments server-side instead of rewriting the whole JSONB column.
     """
-    logger.info(f"Bolna transcript received: call_id={payload.call_id}")
+    logger.info("Bolna transcript received: call_id=%s", payload.call_id)
+
+    redis_client = getattr(request.app.state, 'redis', None)
+
+    # Skip retried deliveries of a transcript we already stored. Keyed on a
+    # digest of the content, since updates of equal length are distinct.
+    transcript_digest = hashlib.blake2b(
+        payload.transcript.encode("utf-8"), digest_size=16
+    ).hexdigest()
+    segment_count = len(payload.segments) if payload.segments else 0
+    idem_key = f"idem:transcript:{payload.call_id}:{transcript_digest}:{segment_count}"
+    if not await once(redis_client, idem_key):
+        return {"status": "ignored", "reason": "duplicate"}
+
+    # Release the claim unless the transcript was stored, so Bolna's retry
+    # of a failed delivery is processed instead of dropped as a duplicate
+    try:
+        result = await _store_transcript(db, redis_client, payload)
+    except Exception:
+        await release(redis_client, idem_key)
+        raise
+    if result["status"] != "ok":
+        await release(redis_client, idem_key)
+    return result
+
 
+async def _store_transcript(
+    db: AsyncSession,
+    redis_client: aioredis.Redis | None,
+    payload: TranscriptPayload,
+) -> dict[str, str]:
+    """Create or update the transcript row for a call."""
     # Find the call by Bolna call_id
     call = await find_call(db, payload.call_id)
 
     if not call:
-        logger.warning(f"Call not found: {payload.call_id}")
+        logger.warning("Call not found: %s", payload.call_id)
         return {"status": "ignored", "reason": "call_not_found"}
 
+    segments_dump = _SEGMENTS_ADAPTER.dump_python(payload.segments) if payload.segments else None
+    segments_len_key = f"call_segments_len:{payload.call_id}"
+
     # Check if transcript already exists
-    result = await db.execute(
-        select(CallTranscript).where(CallTranscript.call_id == call.id)
+    existing_id = await db.scalar(
+        select(CallTranscript.id).where(CallTranscript.call_id == call.id)
     )
-    existing = result.scalar_one_or_none()
 
-    if existing:
-        # Update existing transcript
-        existing.transcript = payload.transcript
-        if payload.segments:
-            existing.segments = [s.model_dump() for s in payload.segments]
+    if existing_id:
+        stored_len = await _get_stored_segments_len(redis_client, segments_len_key)
+
+        appended = False
+        if segments_dump and stored_len is not None and stored_len <= len(segments_dump):
+            # Append only the segments added since the last webhook. The
+            # length guard makes this a no-op when the Redis count is stale
+            # (failed setex, racing deliveries), so segments are never stored twice.
+            result = cast(CursorResult[Any], await db.execute(
+                text("""
+                    UPDATE call_transcripts
+                    SET transcript = :transcript,
+                        segments = coalesce(segments, cast('[]' as jsonb)) || cast(:new_segments as jsonb)
+                    WHERE id = :id
+                      AND jsonb_array_length(coalesce(segments, cast('[]' as jsonb))) = :stored_len
+                """),
+                {
+                    "transcript": payload.transcript,
+                    "new_segments": orjson.dumps(segments_dump[stored_len:]).decode(),
+                    "id": existing_id,
+                    "stored_len": stored_len,
+                },
+            ))
+            appended = result.rowcount > 0
+
+        if not appended:
+            # Unknown or stale stored length - overwrite with the full list
+            values: dict[str, Any] = {"transcript": payload.transcript}
+            if segments_dump:
+                values["segments"] = segments_dump
+            await db.execute(
+                update(CallTranscript)
+                .where(CallTranscript.id == existing_id)
+                .values(**values)
+            )
     else:
         # Create new transcript
         transcript = CallTranscript(
             call_id=call.id,
             transcript=payload.transcript,
-            segments=[s.model_dump() for s in payload.segments] if payload.segments else None,
+            segments=segments_dump,
         )
         db.add(transcript)
 
@@ -153,7 +261,16 @@ async def handle_transcript(
 
     await db.commit()
 
-    logger.info(f"Saved transcript for call {call.id}")
+    # Record how many segments are stored (only after a successful commit)
+    if segments_dump and redis_client:
+        try:
+            await redis_client.setex(
+                segments_len_key, TRANSCRIPT_SEGMENTS_TTL_SECONDS, len(segments_dump)
+            )
+        except Exception as e:
+            logger.warning("Failed to record segment count for %s: %s", payload.call_id, e)
+
+    logger.info("Saved transcript for call %s", call.id)
     return {"status": "ok", "call_id": str(call.id)}
 
 
@@ -177,7 +294,7 @@ async def handle_conversation_webhook(
     from app.schemas.voice import ConversationWebhookPayload
     from app.services.voice_orchestrator import VoiceOrchestrator
     
-    logger.info(f"Bolna conversation webhook: call_id={payload.get('call_id')}")
+    logger.info("Bolna conversation webhook: call_id=%s", payload.get("call_id"))
     
     try:
         # Parse payload
@@ -201,7 +318,9 @@ async def handle_conversation_webhook(
             user_phone=webhook_payload.user_phone or "",
         )
         
-        logger.info(f"Generated response for call {webhook_payload.call_id}: {response_text[:100]}...")
+        logger.info(
+            "Generated response for call %s: %s...", webhook_payload.call_id, response_text[:100]
+        )
         
         return {
             "status": "ok",
@@ -209,7 +328,7 @@ async def handle_conversation_webhook(
         }
         
     except Exception as e:
-        logger.exception(f"Error processing conversation webhook: {e}")
+        logger.exception("Error processing conversation webhook")
         return {
             "status": "error",
             "response": "I apologize, I'm having trouble processing your request. Please try again.",
@@ -219,6 +338,7 @@ async def handle_conversation_webhook(
 @router.post("/tool")
 async def handle_tool_call(
     payload: ToolCallPayload,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     _auth: BolnaAuth = None,
 ) -> dict[str, Any]:
@@ -231,37 +351,25 @@ async def handle_tool_call(
     """
     from app.services.analytics import log_tool_call
 
-    logger.info(f"Bolna tool call: {payload.tool_name} with args {payload.arguments}")
+    logger.info("Bolna tool call: %s with args %s", payload.tool_name, payload.arguments)
 
     result = None
     success = True
 
     try:
-        if payload.tool_name == "search_products":
-            result = await execute_search_products(payload.arguments)
-        elif payload.tool_name == "get_product_details":
-            result = await execute_get_product_details(payload.arguments)
-        elif payload.tool_name == "get_order_status":
-            # SECURITY: Validate phone number before order lookup
-            if not payload.user_phone:
-                result = {"error": "Phone number required for order status lookup"}
-                success = False
-            else:
-                result = await execute_get_order_status(payload.arguments, payload.user_phone)
-        elif payload.tool_name == "get_order_history":
-            # SECURITY: Validate phone number before order history lookup
-            if not payload.user_phone:
-                result = {"error": "Phone number required for order history lookup"}
-                success = False
-            else:
-                result = await execute_get_order_history(payload.arguments, payload.user_phone)
-        elif payload.tool_name == "search_faq":
-            result = await execute_search_faq(db, payload.arguments)
-        elif payload.tool_name == "track_shipment":
-            result = await execute_track_shipment(payload.arguments)
-        else:
+        handler = TOOL_HANDLERS.get(payload.tool_name)
+        if handler is None:
             result = {"error": f"Unknown tool: {payload.tool_name}"}
             success = False
+        elif payload.tool_name in PHONE_REQUIRED_TOOLS and not payload.user_phone:
+            # SECURITY: Validate phone number before order lookups
+            result = {
+                "error": f"Phone number required for {PHONE_REQUIRED_TOOLS[payload.tool_name]} lookup"
+            }
+            success = False
+        else:
+            redis_client = getattr(request.app.state, 'redis', None)
+            result = await handler(payload, db, redis_client)
 
         # Log analytics event for tool call
         await log_tool_call(
@@ -276,7 +384,7 @@ async def handle_tool_call(
         return {"status": "ok", "result": result}
 
     except Exception as e:
-        logger.exception(f"Error executing tool {payload.tool_name}: {e}")
+        logger.exception("Error executing tool %s", payload.tool_name)
         # Still log the failed tool call
         await log_tool_call(
             db=db,
@@ -301,7 +409,10 @@ async def handle_call_complete(
     This is the PRIMARY source for all call data when using Bolna managed platform.
     Creates new call records if they don't exist, and updates existing ones.
     """
-    logger.info(f"Bolna call complete: call_id={payload.call_id}, status={payload.status}")
+    logger.info("Bolna call complete: call_id=%s, status=%s", payload.call_id, payload.status)
+
+    # Single timestamp for every started_at/ended_at written by this webhook
+    now = datetime.now(timezone.utc)
 
     # Extract phone number from various possible locations in payload
     phone = (
@@ -322,85 +433,63 @@ async def handle_call_complete(
     if not duration and payload.telephony_data and payload.telephony_data.call_duration:
         duration = payload.telephony_data.call_duration
 
-    # Map status to enum
-    status_map = {
-        "completed": CallStatus.RESOLVED,
-        "resolved": CallStatus.RESOLVED,
-        "escalated": CallStatus.ESCALATED,
-        "transferred": CallStatus.ESCALATED,
-        "failed": CallStatus.FAILED,
-        "error": CallStatus.FAILED,
-        "missed": CallStatus.MISSED,
-        "no-answer": CallStatus.MISSED,
-        "busy": CallStatus.MISSED,
-    }
-    call_status = status_map.get(payload.status.lower(), CallStatus.RESOLVED)
-
-    # Find existing call by Bolna call_id
-    call = await find_call(db, payload.call_id)
+    call_status = BOLNA_STATUS_MAP.get(payload.status.lower(), CallStatus.RESOLVED)
 
-    if call:
-        # Update existing call
-        call.status = call_status
-        if duration:
-            call.duration_seconds = duration
-        if payload.language:
-            call.language = payload.language
-        if recording_url:
-            call.recording_url = recording_url
-        call.ended_at = datetime.now(timezone.utc)
-        
-        logger.info(f"Updated existing call {call.id}")
+    # Patch an existing call in one UPDATE ... RETURNING (no SELECT/ORM load)
+    changes: dict[str, Any] = {"status": call_status, "ended_at": now}
+    if duration:
+        changes["duration_seconds"] = duration
+    if payload.language:
+        changes["language"] = payload.language
+    if recording_url:
+        changes["recording_url"] = recording_url
+
+    result = await db.execute(
+        update(Call)
+        .where(Call.bolna_call_id == payload.call_id)
+        .values(**changes)
+        .returning(Call.id, Call.conversation_id)
+    )
+    updated = result.first()
+
+    if updated:
+        call_id, conversation_id = updated
+
+        # Close the linked conversation in a single UPDATE (no separate SELECT)
+        if conversation_id:
+            await db.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_id)
+                .values(status=ConversationStatus.CLOSED, ended_at=now)
+                .execution_options(synchronize_session="fetch")
+            )
+
+        logger.info("Updated existing call %s", call_id)
     else:
         # CREATE NEW CALL - Bolna is the sole source of call data
         if not phone:
-            logger.warning(f"Cannot create call without phone number: call_id={payload.call_id}")
+            logger.warning("Cannot create call without phone number: call_id=%s", payload.call_id)
             return {"status": "error", "reason": "missing_phone_number"}
 
-        # Get or create user
-        user = await get_or_create_user(db, phone)
-
-        # Create conversation for this call
-        conversation = Conversation(
-            user_id=user.id,
-            channel=ChannelType.VOICE,
-            status=ConversationStatus.CLOSED,
-            started_at=datetime.now(timezone.utc),
-            ended_at=datetime.now(timezone.utc),
-        )
-        db.add(conversation)
-        await db.flush()
-
-        # Create new call record
-        call = Call(
-            conversation_id=conversation.id,
-            user_id=user.id,
+        call = await create_call_record(
+            db,
             phone=phone,
             bolna_call_id=payload.call_id,
-            direction=CallDirection.INBOUND,  # Assume inbound for Bolna calls
             status=call_status,
-            duration_seconds=duration,
+            duration=duration,
             recording_url=recording_url,
             language=payload.language,
-            started_at=datetime.now(timezone.utc),
-            ended_at=datetime.now(timezone.utc),
+            now=now,
         )
-        db.add(call)
-        await db.flush()
-
-        logger.info(f"Created new call {call.id} for phone {phone}")
+        call_id = call.id
 
-    # Update conversation status if exists
-    if call.conversation_id:
-        conversation = await db.get(Conversation, call.conversation_id)
-        if conversation:
-            conversation.status = ConversationStatus.CLOSED
-            conversation.ended_at = datetime.now(timezone.utc)
+        # The conversation is inserted already closed, so no UPDATE is needed
+        logger.info("Created new call %s for phone %s", call_id, phone)
 
     # Save final transcript if provided
     if payload.transcript:
         result = await db.execute(
-            select(CallTranscript).where(CallTranscript.call_id == call.id)
+            select(CallTranscript).where(CallTranscript.call_id == call_id)
         )
         existing = result.scalar_one_or_none()
 
@@ -408,7 +497,7 @@ async def handle_call_complete(
             existing.transcript = payload.transcript
         else:
             transcript = CallTranscript(
-                call_id=call.id,
+                call_id=call_id,
                 transcript=payload.transcript,
             )
             db.add(transcript)
@@ -430,17 +519,26 @@ async def handle_call_complete(
             )
             
             if confirmation_result:
-                logger.info(f"Confirmation call result: order={confirmation_result['order_id']}, confirmed={confirmation_result['confirmed']}")
+                logger.info(
+                    "Confirmation call result: order=%s, confirmed=%s",
+                    confirmation_result["order_id"],
+                    confirmation_result["confirmed"],
+                )
         except Exception as e:
-            logger.error(f"Error processing confirmation call: {e}", exc_info=True)
+            logger.error("Error processing confirmation call: %s", e, exc_info=True)
             # Don't fail the webhook if confirmation processing fails
     else:
         logger.warning("Redis client not available, skipping confirmation call processing")
 
     await db.commit()
 
-    logger.info(f"Call {call.id} marked as {call.status.value}, recording_url={'set' if recording_url else 'not set'}")
-    return {"status": "ok", "call_id": str(call.id)}
+    logger.info(
+        "Call %s marked as %s, recording_url=%s",
+        call_id,
+        call_status.value,
+        "set" if recording_url else "not set",
+    )
+    return {"status": "ok", "call_id": str(call_id)}
 
 
 # =============================================================================
@@ -477,7 +575,7 @@ async def execute_search_products(args: dict[str, Any]) -> dict[str, Any]:
         }
 
     except ChicxAPIError as e:
-        logger.error(f"Product search error: {e}")
+        logger.error("Product search error: %s", e)
         return {"message": "Sorry, I couldn't search products right now. Please try again."}
 
 
@@ -516,11 +614,13 @@ async def execute_get_product_details(args: dict[str, Any]) -> dict[str, Any]:
         }
 
     except ChicxAPIError as e:
-        logger.error(f"Product details error: {e}")
+        logger.error("Product details error: %s", e)
         return {"message": "Sorry, I couldn't get product details right now. Please try again."}
 
 
-async def execute_get_order_status(args: dict[str, Any], user_phone: str) -> dict[str, Any]:
+async def execute_get_order_status(
+    args: dict[str, Any], user_phone: str | None
+) -> dict[str, Any]:
     """Execute order status lookup via CHICX API.
     
     SECURITY: This function requires caller phone number for authorization.
@@ -528,7 +628,8 @@ async def execute_get_order_status(args: dict[str, Any], user_phone: str) -> dic
     
     Args:
         args: Tool arguments containing order_id
-        user_phone: Caller's phone number for authorization (REQUIRED, not optional)
+        user_phone: Caller's phone number for authorization (REQUIRED - typed
+            Optional only so the missing-phone check below is enforced)
         
     Returns:
         Order status information if authorized, error message otherwise
@@ -538,7 +639,9 @@ async def execute_get_order_status(args: dict[str, Any], user_phone: str) -> dic
     """
     # CRITICAL: Validate phone number is provided (defense in depth)
     if not user_phone:
-        logger.error(f"SECURITY: Order status check without phone number: order_id={args.get('order_id')}")
+        logger.error(
+            "SECURITY: Order status check without phone number: order_id=%s", args.get("order_id")
+        )
         raise ValueError("user_phone is required for order status lookup")
     
     client = get_chicx_client()
@@ -560,15 +663,20 @@ async def execute_get_order_status(args: dict[str, Any], user_phone: str) -> dic
         normalized_order = normalize_phone(order_phone, for_db=True)
         
         if not normalized_caller or not normalized_order:
-            logger.error(f"Phone normalization failed: caller={user_phone}, order={order_phone}")
+            logger.error("Phone normalization failed: caller=%s, order=%s", user_phone, order_phone)
             return {"message": "Unable to verify order ownership. Please contact support."}
         
         if normalized_caller != normalized_order:
             # Unauthorized access attempt
             logger.warning(
-                f"Unauthorized order access attempt: "
-                f"caller={user_phone} (normalized={normalized_caller}) "
-                f"tried order={order_id} belonging to={order_phone} (normalized={normalized_order})"
+                "Unauthorized order access attempt: "
+                "caller=%s (normalized=%s) "
+                "tried order=%s belonging to=%s (normalized=%s)",
+                user_phone,
+                normalized_caller,
+                order_id,
+                order_phone,
+                normalized_order,
             )
             return {"message": f"Order {order_id} not found in your account. Please check the order ID."}
         
@@ -591,17 +699,20 @@ async def execute_get_order_status(args: dict[str, Any], user_phone: str) -> dic
         return {"status": status, "message": message}
 
     except ChicxAPIError as e:
-        logger.error(f"Order status error: {e}")
+        logger.error("Order status error: %s", e)
         return {"message": "Sorry, I couldn't check your order status right now. Please try again."}
 
 
 
-async def execute_get_order_history(args: dict[str, Any], user_phone: str) -> dict[str, Any]:
+async def execute_get_order_history(
+    args: dict[str, Any], user_phone: str | None
+) -> dict[str, Any]:
     """Execute order history lookup via CHICX API.
     
     Args:
         args: Tool arguments (limit, status_filter)
-        user_phone: Caller's phone number (REQUIRED, not optional)
+        user_phone: Caller's phone number (REQUIRED - typed Optional only so
+            the missing-phone check below is enforced)
         
     Returns:
         Order history information
@@ -644,17 +755,38 @@ async def execute_get_order_history(args: dict[str, Any], user_phone: str) -> di
         }
 
     except ChicxAPIError as e:
-        logger.error(f"Order history error: {e}")
+        logger.error("Order history error: %s", e)
         return {"message": "Sorry, I couldn't get your order history right now. Please try again."}
 
 
-async def execute_search_faq(db: AsyncSession, args: dict[str, Any]) -> dict[str, Any]:
-    """Execute FAQ search using pgvector."""
+async def execute_search_faq(
+    db: AsyncSession,
+    args: dict[str, Any],
+    redis_client: aioredis.Redis | None = None,
+) -> dict[str, Any]:
+    """Execute FAQ search using pgvector.
+
+    The best match is cached in Redis by normalized query text, so repeated
+    questions skip the embedding call and vector scan.
+    """
     query = args.get("query", "")
 
     if not query:
         return {"message": "What would you like to know about?"}
 
+    cache_key = _faq_cache_key(query)
+    if redis_client:
+        try:
+            cached = await redis_client.get(cache_key)
+            if cached:
+                best_match = json.loads(cached)
+                return {
+                    "answer": best_match["answer"],
+                    "message": best_match["answer"],
+                }
+        except Exception as e:
+            logger.warning("FAQ cache read failed: %s", e)
+
     embedding_service = EmbeddingService(db)
 
     try:
@@ -671,13 +803,20 @@ async def execute_search_faq(db: AsyncSession, args: dict[str, Any]) -> dict[str
 
         # Return the best matching answer
         best_match = faqs[0]
+
+        if redis_client:
+            try:
+                await redis_client.setex(cache_key, FAQ_CACHE_TTL_SECONDS, json.dumps(best_match))
+            except Exception as e:
+                logger.warning("FAQ cache write failed: %s", e)
+
         return {
             "answer": best_match["answer"],
             "message": best_match["answer"],
         }
 
     except Exception as e:
-        logger.error(f"FAQ search error: {e}")
+        logger.error("FAQ search error: %s", e)
         return {"message": "Sorry, I couldn't find that information. Please contact support@chicx.in."}
 
 
@@ -690,7 +829,7 @@ async def execute_track_shipment(args: dict[str, Any]) -> dict[str, Any]:
     if not awb_number:
         return {"message": "I need the tracking number or AWB number to track your shipment."}
 
-    logger.info(f"Tracking shipment for voice: AWB={awb_number}")
+    logger.info("Tracking shipment for voice: AWB=%s", awb_number)
 
     try:
         shiprocket = get_shiprocket_client()
@@ -724,13 +863,39 @@ async def execute_track_shipment(args: dict[str, Any]) -> dict[str, Any]:
         }
 
     except ShiprocketAPIError as e:
-        logger.error(f"Shiprocket API error: {e}")
+        logger.error("Shiprocket API error: %s", e)
         return {"message": "I'm unable to fetch tracking information right now. Please try again later."}
     except Exception as e:
-        logger.error(f"Tracking error: {e}")
+        logger.error("Tracking error: %s", e)
         return {"message": "Sorry, I couldn't track that shipment. Please try again."}
 
 
+# =============================================================================
+# Tool Dispatch
+# =============================================================================
+
+ToolHandler = Callable[
+    [ToolCallPayload, AsyncSession, aioredis.Redis | None],
+    Awaitable[dict[str, Any]],
+]
+
+# Tool name -> handler, resolved with a single dict lookup per tool call
+TOOL_HANDLERS: dict[str, ToolHandler] = {
+    ToolName.SEARCH_PRODUCTS: lambda p, db, r: execute_search_products(p.arguments),
+    ToolName.GET_PRODUCT_DETAILS: lambda p, db, r: execute_get_product_details(p.arguments),
+    ToolName.GET_ORDER_STATUS: lambda p, db, r: execute_get_order_status(p.arguments, p.user_phone),
+    ToolName.GET_ORDER_HISTORY: lambda p, db, r: execute_get_order_history(p.arguments, p.user_phone),
+    ToolName.SEARCH_FAQ: lambda p, db, r: execute_search_faq(db, p.arguments, r),
+    ToolName.TRACK_SHIPMENT: lambda p, db, r: execute_track_shipment(p.arguments),
+}
+
+# Tools that access user data -> description used in the missing-phone error
+PHONE_REQUIRED_TOOLS: dict[str, str] = {
+    ToolName.GET_ORDER_STATUS: "order status",
+    ToolName.GET_ORDER_HISTORY: "order history",
+}
+
+
 # =============================================================================
 # Helper Functions
 # =============================================================================
@@ -740,50 +905,133 @@ async def find_call(
     db: AsyncSession,
     bolna_call_id: str,
 ) -> Call | None:
-    """Find a call by Bolna call_id."""
+    """Find a call by Bolna call_id.
+
+    Runs on every transcript update, so the statement is built as a
+    lambda_stmt: SQLAlchemy caches the construct and only rebinds the id.
+    """
     result = await db.execute(
-        select(Call).where(Call.bolna_call_id == bolna_call_id)
+        lambda_stmt(lambda: select(Call).where(Call.bolna_call_id == bolna_call_id))
     )
     return result.scalar_one_or_none()
 
 
+async def _get_stored_segments_len(
+    redis_client: aioredis.Redis | None,
+    key: str,
+) -> int | None:
+    """Get the number of transcript segments already stored, if known."""
+    if not redis_client:
+        return None
+    try:
+        value = await redis_client.get(key)
+        return int(value) if value is not None else None
+    except Exception as e:
+        logger.warning("Failed to read segment count: %s", e)
+        return None
+
+
+def _faq_cache_key(query: str) -> str:
+    """Build the Redis cache key for a FAQ query (case/whitespace-insensitive)."""
+    normalized = query.strip().lower()[:128]
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+    return f"{FAQ_CACHE_PREFIX}:{digest}"
+
+
 # normalize_phone is imported from app.utils.phone (module-level import)
 
 
-async def get_or_create_user(db: AsyncSession, phone: str) -> User:
-    """Get existing user or create new one.
-    
+async def create_call_record(
+    db: AsyncSession,
+    *,
+    phone: str,
+    bolna_call_id: str,
+    status: CallStatus,
+    duration: int | None,
+    recording_url: str | None,
+    language: str | None,
+    now: datetime,
+) -> Call:
+    """Create the user (if new), a closed voice conversation and the call row.
+
+    All three inserts are chained in one statement via data-modifying CTEs
+    (user UPSERT -> conversation INSERT -> call INSERT), so a new call costs a
+    single database round-trip and is safe against concurrent first calls
+    from the same number.
+
     IMPORTANT: Phone numbers are stored in database WITHOUT '+' prefix
     to match existing records. Use normalize_phone(phone, for_db=True).
-    
+
     Args:
         phone: Phone number in any format
-        
+        bolna_call_id: Bolna call identifier
+        status: Final call status
+        duration: Call duration in seconds, if known
+        recording_url: Recording URL, if any
+        language: Detected call language, if any
+        now: Timestamp used for started_at/ended_at
+
     Returns:
-        User object (existing or newly created)
-        
+        The newly created Call
+
     Raises:
         ValueError: If phone normalization fails
     """
     # Normalize to database format (without + prefix)
     db_phone = normalize_phone(phone, for_db=True)
-    
+
     if not db_phone:
-        logger.error(f"Failed to normalize phone number: {phone}")
+        logger.error("Failed to normalize phone number: %s", phone)
         raise ValueError(f"Invalid phone number format: {phone}")
-    
-    result = await db.execute(
-        select(User).where(User.phone == db_phone)
+
+    # Primary keys and timestamps are passed explicitly: column defaults
+    # cannot be prefetched for INSERTs nested inside a CTE.
+    new_user = (
+        pg_insert(User)
+        .values(id=uuid.uuid4(), phone=db_phone, created_at=now)
+        .on_conflict_do_update(
+            index_elements=[User.phone],
+            set_={"phone": db_phone},
+        )
+        .returning(User.id)
+        .cte("new_user")
     )
-    user = result.scalar_one_or_none()
+    user_id = select(new_user.c.id).scalar_subquery()
 
-    if not user:
-        user = User(phone=db_phone)
-        db.add(user)
-        await db.flush()
-        logger.info(f"Created new user for phone: {db_phone}")
+    new_conversation = (
+        insert(Conversation)
+        .values(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            channel=ChannelType.VOICE,
+            status=ConversationStatus.CLOSED,
+            started_at=now,
+            ended_at=now,
+        )
+        .returning(Conversation.id)
+        .cte("new_conversation")
+    )
 
-    return user
+    stmt = (
+        insert(Call)
+        .values(
+            id=uuid.uuid4(),
+            conversation_id=select(new_conversation.c.id).scalar_subquery(),
+            user_id=user_id,
+            phone=phone,
+            bolna_call_id=bolna_call_id,
+            direction=CallDirection.INBOUND,  # Assume inbound for Bolna calls
+            status=status,
+            duration_seconds=duration,
+            recording_url=recording_url,
+            language=language,
+            started_at=now,
+            ended_at=now,
+        )
+        .returning(Call)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one()
 
 
 # =============================================================================
@@ -812,8 +1060,6 @@ async def process_confirmation_call(
     Returns:
         Dict with confirmation result, or None if not a confirmation call
     """
-    import json
-    
     try:
         # Direct O(1) lookup: call_id -> order_id mapping
         # This key is set in chicx.py when initiating the outbound call
@@ -823,9 +1069,6 @@ async def process_confirmation_call(
             # Not a confirmation call
             return None
         
-        # Also get the full order data if it exists
-        order_data = await redis_client.get(f"pending_confirmation:{order_id}")
-        
         # Determine if order was confirmed from transcript
         confirmed = False
         confirmation_notes = ""
@@ -838,13 +1081,9 @@ async def process_confirmation_call(
             # Analyze transcript for confirmation
             transcript_lower = transcript.lower()
             
-            # Look for positive confirmations
-            positive_keywords = ["yes", "confirm", "haan", "theek", "ok", "okay", "proceed", "correct", "sure"]
-            negative_keywords = ["no", "cancel", "nahi", "wrong", "incorrect", "stop", "reject"]
-            
             # Count keyword matches
-            positive_count = sum(1 for kw in positive_keywords if kw in transcript_lower)
-            negative_count = sum(1 for kw in negative_keywords if kw in transcript_lower)
+            positive_count = sum(1 for kw in CONFIRMATION_POSITIVE_KEYWORDS if kw in transcript_lower)
+            negative_count = sum(1 for kw in CONFIRMATION_NEGATIVE_KEYWORDS if kw in transcript_lower)
             
             if positive_count > negative_count:
                 confirmed = True
@@ -867,13 +1106,15 @@ async def process_confirmation_call(
                 confirmed=confirmed,
                 confirmation_notes=confirmation_notes,
             )
-            logger.info(f"Sent confirmation to CHICX: order={order_id}, confirmed={confirmed}")
+            logger.info("Sent confirmation to CHICX: order=%s, confirmed=%s", order_id, confirmed)
         except Exception as e:
-            logger.error(f"Failed to send confirmation to CHICX: {e}")
+            logger.error("Failed to send confirmation to CHICX: %s", e)
         
-        # Clean up both Redis keys
-        await redis_client.delete(f"confirmation_call:{call_id}")
-        await redis_client.delete(f"pending_confirmation:{order_id}")
+        # Clean up both Redis keys in one round trip
+        await redis_client.delete(
+            f"confirmation_call:{call_id}",
+            f"pending_confirmation:{order_id}",
+        )
         
         return {
             "order_id": order_id,
@@ -882,6 +1123,6 @@ async def process_confirmation_call(
         }
         
     except Exception as e:
-        logger.error(f"Error processing confirmation call: {e}")
+        logger.error("Error processing confirmation call: %s", e)
         return None
 
@@ -8,22 +8,32 @@ These endpoints are called BY the CHICX backend to trigger notifications:
 Marketing (cart reminders, product announcements, sales) is handled via AiSensy dashboard.
 """
 
+import asyncio
+import hmac
 import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any
 
+import orjson
 import redis.asyncio as aioredis
-from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Header, Request
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.db.session import get_db
 from app.services.whatsapp import WhatsAppService
+from app.utils.idempotency import once, release
 from app.utils.phone import normalize_phone
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/webhooks/chicx", tags=["CHICX Notifications"])
 
+settings = get_settings()
+
+CONFIRMATION_TTL_SECONDS = 3600  # 1 hour for pending confirmation tracking
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60  # Idempotency keys are honoured for 1 day
+
 
 # =============================================================================
 # Pydantic Models
@@ -72,27 +82,146 @@ class OrderConfirmPayload(BaseModel):
 # =============================================================================
 
 
-def verify_chicx_webhook(
+async def _verify_chicx_secret(
     x_chicx_secret: str = Header(None, alias="X-CHICX-Secret"),
 ) -> bool:
     """Verify CHICX webhook secret."""
-    settings = get_settings()
-    
-    if not settings.chicx_api_key:
-        logger.warning("CHICX_API_KEY not configured, skipping webhook auth")
-        return True
-    
-    if x_chicx_secret != settings.chicx_api_key:
+    if not x_chicx_secret or not hmac.compare_digest(
+        x_chicx_secret.encode(), settings.chicx_api_key_bytes
+    ):
         raise HTTPException(status_code=401, detail="Invalid webhook secret")
     
     return True
 
 
+async def _skip_chicx_auth() -> bool:
+    """Accept all requests when no CHICX secret is configured."""
+    return True
+
+
+# Settings are fixed for the process lifetime, so pick the verifier once.
+# Both are async so FastAPI runs them inline instead of in the threadpool.
+verify_chicx_webhook: Callable[..., Awaitable[bool]]
+if settings.chicx_api_key:
+    verify_chicx_webhook = _verify_chicx_secret
+else:
+    logger.warning("CHICX_API_KEY not configured, skipping webhook auth")
+    verify_chicx_webhook = _skip_chicx_auth
+
+
 async def get_redis(request: Request) -> aioredis.Redis:
     """Get Redis client from app state."""
     return request.app.state.redis
 
 
+class IdempotencyClaim:
+    """Handle on the idempotency key claimed for the current request.
+
+    Handlers return `replay` as-is when it is set (the key was already used).
+    Otherwise they pass their success result through remember() so later
+    replays get the same body, and call release() when they report a failure
+    with an error result instead of raising, so the sender's retry is processed.
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis | None,
+        key: str | None,
+        replay: dict[str, Any] | None = None,
+    ) -> None:
+        self._redis = redis_client
+        self._key = key
+        self.replay = replay
+
+    async def remember(self, result: dict[str, Any]) -> dict[str, Any]:
+        """Store a success result for replays of this key and return it."""
+        if self._key is not None and self._redis is not None:
+            try:
+                await self._redis.setex(
+                    f"{self._key}:resp", IDEMPOTENCY_KEY_TTL_SECONDS, orjson.dumps(result)
+                )
+            except Exception as e:
+                logger.warning("Failed to store response for %s: %s", self._key, e)
+        return result
+
+    async def release(self) -> None:
+        """Release the claimed key; a no-op when the request carried none."""
+        if self._key is not None:
+            await release(self._redis, self._key)
+            self._key = None
+
+
+async def _stored_response(redis_client: aioredis.Redis | None, key: str) -> dict[str, Any]:
+    """Load the response recorded for a claimed key, marked as a dedup replay.
+
+    Falls back to a bare {"status": "ok", "dedup": True} (the same body the
+    payload-level order-update dedup returns) while the first delivery is
+    still in flight or if the stored body is unavailable.
+    """
+    stored = None
+    if redis_client is not None:
+        try:
+            stored = await redis_client.get(f"{key}:resp")
+        except Exception as e:
+            logger.warning("Failed to load stored response for %s: %s", key, e)
+    if stored:
+        return {**orjson.loads(stored), "dedup": True}
+    return {"status": "ok", "dedup": True}
+
+
+async def chicx_idempotency_guard(
+    redis_client: aioredis.Redis = Depends(get_redis),
+    idempotency_key: str | None = Header(None, alias="X-CHICX-Idempotency-Key"),
+) -> AsyncIterator[IdempotencyClaim]:
+    """Replay the stored response for an already-seen idempotency key.
+
+    CHICX retries when it times out on a send that may have succeeded, so a
+    replay answers 200 with the original response instead of redoing the
+    work. Requests without the header are processed as before. If the
+    handler raises, or releases the yielded claim, the key is released so
+    the sender's retry is processed.
+    """
+    if not idempotency_key:
+        yield IdempotencyClaim(redis_client, None)
+        return
+
+    key = f"idem:chicx:{idempotency_key}"
+    if not await once(redis_client, key, ttl=IDEMPOTENCY_KEY_TTL_SECONDS):
+        logger.info("Duplicate CHICX webhook replayed: idempotency_key=%s", idempotency_key)
+        yield IdempotencyClaim(redis_client, None, replay=await _stored_response(redis_client, key))
+        return
+
+    claim = IdempotencyClaim(redis_client, key)
+    try:
+        yield claim
+    except Exception:
+        await claim.release()
+        raise
+
+
+# =============================================================================
+# Template Component Builders
+# =============================================================================
+
+
+def _body_component(*texts: str) -> dict[str, Any]:
+    """Build a template body component with positional text parameters."""
+    return {
+        "type": "body",
+        "parameters": [{"type": "text", "text": t} for t in texts],
+    }
+
+
+def _button_component(sub_type: str, text: str, index: str = "0") -> dict[str, Any]:
+    """Build a template button component with a single text parameter."""
+    return {
+        "type": "button",
+        "sub_type": sub_type,
+        "index": index,
+        "parameters": [{"type": "text", "text": text}],
+    }
+
+
 # =============================================================================
 # Webhook Endpoints
 # =============================================================================
@@ -105,6 +234,7 @@ async def handle_send_otp(
     db: AsyncSession = Depends(get_db),
     redis_client: aioredis.Redis = Depends(get_redis),
     _auth: bool = Depends(verify_chicx_webhook),
+    idempotency: IdempotencyClaim = Depends(chicx_idempotency_guard),
 ) -> dict[str, Any]:
     """Send login OTP to user via WhatsApp.
 
@@ -118,7 +248,10 @@ async def handle_send_otp(
     }
     ```
     """
-    logger.info(f"Send OTP webhook: phone={payload.phone}")
+    logger.info("Send OTP webhook: phone=%s", payload.phone)
+
+    if idempotency.replay is not None:
+        return idempotency.replay
 
     phone = normalize_phone(payload.phone)
 
@@ -126,52 +259,38 @@ async def handle_send_otp(
     # Meta authentication templates use: {{1}} = OTP code in body
     # Button must be "copy_code" type for OTP auto-copy functionality
     components = [
-        {
-            "type": "body",
-            "parameters": [
-                {"type": "text", "text": payload.otp},
-            ],
-        },
-        # Copy code button (Meta authentication template format)
-        {
-            "type": "button",
-            "sub_type": "copy_code",
-            "index": "0",
-            "parameters": [
-                {"type": "text", "text": payload.otp},
-            ],
-        },
+        _body_component(payload.otp),
+        _button_component("copy_code", payload.otp),
     ]
 
-    try:
-        wa_service = WhatsAppService(db=db, redis_client=redis_client)
+    wa_service = WhatsAppService(db=db, redis_client=redis_client)
 
+    # Only the Graph API call can fail here
+    try:
         result = await wa_service.send_template_message(
             to=phone,
             template_name="otp_login",
             language_code="en",
             components=components,
         )
-
-        await wa_service.close()
-
-        logger.info(f"Login OTP sent successfully to {phone}")
-
-        return {
-            "status": "ok",
-            "message": f"OTP sent to {payload.phone}",
-            "phone": payload.phone,
-            "wa_message_id": result.get("messages", [{}])[0].get("id"),
-        }
-
     except Exception as e:
-        logger.error(f"Failed to send OTP to {payload.phone}: {e}")
+        logger.error("Failed to send OTP to %s: %s", payload.phone, e)
+        await idempotency.release()
         return {
             "status": "error",
             "message": str(e),
             "phone": payload.phone,
         }
 
+    logger.info("Login OTP sent successfully to %s", phone)
+
+    return await idempotency.remember({
+        "status": "ok",
+        "message": f"OTP sent to {payload.phone}",
+        "phone": payload.phone,
+        "wa_message_id": result.get("messages", [{}])[0].get("id"),
+    })
+
 
 @router.post("/order-update")
 async def handle_order_update(
@@ -180,6 +299,7 @@ async def handle_order_update(
     db: AsyncSession = Depends(get_db),
     redis_client: aioredis.Redis = Depends(get_redis),
     _auth: bool = Depends(verify_chicx_webhook),
+    idempotency: IdempotencyClaim = Depends(chicx_idempotency_guard),
 ) -> dict[str, Any]:
     """Handle order status update from CHICX backend.
     
@@ -189,76 +309,77 @@ async def handle_order_update(
     Template: order_update
     Parameters: {{1}} order_id, {{2}} order_status
     """
-    logger.info(f"Order update webhook: {payload.order_id} -> {payload.order_status}")
+    logger.info("Order update webhook: %s -> %s", payload.order_id, payload.order_status)
+
+    if idempotency.replay is not None:
+        return idempotency.replay
+
+    # Skip retried deliveries so the customer is notified once per status
+    idem_key = f"idem:order_update:{payload.order_id}:{payload.order_status}"
+    if not await once(redis_client, idem_key):
+        logger.info("Duplicate order update ignored: %s", payload.order_id)
+        return {"status": "ok", "dedup": True}
 
     phone = normalize_phone(payload.phone)
 
-    try:
-        wa_service = WhatsAppService(db=db, redis_client=redis_client)
-        
-        # Build template components
-        components = [
-            {
-                "type": "body",
-                "parameters": [
-                    {"type": "text", "text": payload.order_id},
-                    {"type": "text", "text": payload.order_status},
-                ],
-            }
-        ]
-        
-        # Add tracking URL button if provided
-        # NOTE: Pass URL suffix if template has base URL, or full URL if fully dynamic
-        if payload.tracking_url:
-            components.append({
-                "type": "button",
-                "sub_type": "url",
-                "index": "0",
-                "parameters": [
-                    {"type": "text", "text": payload.tracking_url}
-                ],
-            })
+    # Build template components
+    components = [_body_component(payload.order_id, payload.order_status)]
+
+    # Add tracking URL button if provided
+    # NOTE: Pass URL suffix if template has base URL, or full URL if fully dynamic
+    if payload.tracking_url:
+        components.append(_button_component("url", payload.tracking_url))
 
+    wa_service = WhatsAppService(db=db, redis_client=redis_client)
+
+    # Only the Graph API call can fail here
+    try:
         result = await wa_service.send_template_message(
             to=phone,
             template_name="order_update",
             language_code="en",
             components=components,
         )
-        
-        await wa_service.close()
-        
-        logger.info(f"Order update sent to {phone}")
-        
-        return {
-            "status": "ok",
-            "message": f"Order update notification sent to {payload.phone}",
-            "order_id": payload.order_id,
-            "order_status": payload.order_status,
-            "wa_message_id": result.get("messages", [{}])[0].get("id"),
-        }
-    
     except Exception as e:
-        logger.error(f"Failed to send order update: {e}")
+        logger.error("Failed to send order update: %s", e)
+        await release(redis_client, idem_key)
+        await idempotency.release()
         return {
             "status": "error",
             "message": str(e),
             "order_id": payload.order_id,
         }
 
+    logger.info("Order update sent to %s", phone)
+
+    return await idempotency.remember({
+        "status": "ok",
+        "message": f"Order update notification sent to {payload.phone}",
+        "order_id": payload.order_id,
+        "order_status": payload.order_status,
+        "wa_message_id": result.get("messages", [{}])[0].get("id"),
+    })
+
 
 @router.post("/confirm-order")
 async def handle_confirm_order(
     payload: OrderConfirmPayload,
     request: Request,
+    background: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     redis_client: aioredis.Redis = Depends(get_redis),
     _auth: bool = Depends(verify_chicx_webhook),
+    idempotency: IdempotencyClaim = Depends(chicx_idempotency_guard),
 ) -> dict[str, Any]:
     """Trigger outbound call to confirm order with customer.
     
     CHICX backend calls this for COD orders or high-value orders
     that need customer confirmation via phone call.
+
+    The Bolna call is placed in a background task after the response is
+    sent, so this endpoint returns "queued" without waiting on the Bolna
+    API. The outcome (call_id or failure) is recorded in Redis and can be
+    polled via GET /webhooks/chicx/confirm-order/{order_id}.
     
     Example request:
     ```json
@@ -272,15 +393,15 @@ async def handle_confirm_order(
     }
     ```
     """
-    from app.services.bolna import get_bolna_client, BolnaAPIError
-    
-    logger.info(f"Order confirmation webhook for: {payload.order_id}, phone: {payload.phone}")
-    
-    settings = get_settings()
+    logger.info("Order confirmation webhook for: %s, phone: %s", payload.order_id, payload.phone)
+
+    if idempotency.replay is not None:
+        return idempotency.replay
     
     # Check if Bolna agent is configured
     if not settings.bolna_api_key:
         logger.error("BOLNA_API_KEY not configured")
+        await idempotency.release()
         return {
             "status": "error",
             "message": "Bolna not configured",
@@ -290,6 +411,7 @@ async def handle_confirm_order(
     # Check if confirmation agent ID is configured
     if not settings.bolna_confirmation_agent_id:
         logger.error("BOLNA_CONFIRMATION_AGENT_ID not configured")
+        await idempotency.release()
         return {
             "status": "error",
             "message": "Confirmation agent not configured",
@@ -314,55 +436,126 @@ async def handle_confirm_order(
         "callback_order_id": payload.order_id,  # Used in call-complete to identify
     }
     
-    # Store pending confirmation in Redis for tracking
-    confirmation_key = f"pending_confirmation:{payload.order_id}"
-    await redis_client.setex(
-        confirmation_key,
-        3600,  # 1 hour TTL
+    await _set_call_status(redis_client, payload.order_id, {"status": "queued"})
+
+    # Record the pending confirmation and place the call after the response is sent
+    background.add_task(
+        _fire_call,
+        redis_client,
+        phone,
+        settings.bolna_confirmation_agent_id,
+        context,
+        payload.order_id,
         payload.model_dump_json(),
+        idempotency,
     )
-    
+
+    return await idempotency.remember({
+        "status": "queued",
+        "message": f"Confirmation call queued for order {payload.order_id}",
+        "order_id": payload.order_id,
+        "phone": payload.phone,
+    })
+
+
+@router.get("/confirm-order/{order_id}")
+async def get_confirm_order_status(
+    order_id: str,
+    redis_client: aioredis.Redis = Depends(get_redis),
+    _auth: bool = Depends(verify_chicx_webhook),
+) -> dict[str, Any]:
+    """Poll the outcome of a queued order confirmation call.
+
+    Returns {"order_id", "status"} where status is "queued" until the Bolna
+    request completes, then "initiated" (with "call_id") or "failed" (with
+    "error"). A failed call can be retried by posting to /confirm-order again.
+    """
+    stored = await redis_client.get(f"confirmation_order_call:{order_id}")
+    if not stored:
+        raise HTTPException(status_code=404, detail="No confirmation call for this order")
+    return {"order_id": order_id, **orjson.loads(stored)}
+
+
+async def _set_call_status(
+    redis_client: aioredis.Redis, order_id: str, status: dict[str, Any]
+) -> None:
+    """Record the confirmation call outcome for the status endpoint."""
     try:
-        bolna = get_bolna_client()
-        
-        result = await bolna.make_outbound_call(
+        await redis_client.setex(
+            f"confirmation_order_call:{order_id}",
+            CONFIRMATION_TTL_SECONDS,
+            orjson.dumps(status),
+        )
+    except Exception as e:
+        logger.error("Failed to store confirmation call status for order %s: %s", order_id, e)
+
+
+async def _fire_call(
+    redis_client: aioredis.Redis,
+    phone: str,
+    agent_id: str,
+    context: dict[str, Any],
+    order_id: str,
+    order_json: str,
+    idempotency: IdempotencyClaim,
+) -> None:
+    """Initiate the outbound confirmation call (runs as a background task).
+
+    The pending confirmation record is written to Redis while the Bolna
+    request is in flight, since neither depends on the other.
+
+    Errors are logged and recorded as a "failed" call status rather than
+    raised, since the webhook response has already been sent. On failure the
+    pending record is dropped and the idempotency key released so CHICX can
+    retry the confirmation.
+    """
+    from app.services.bolna import get_bolna_client, BolnaAPIError
+
+    bolna = get_bolna_client()
+
+    # Store pending confirmation in Redis for tracking, alongside the call
+    stored, result = await asyncio.gather(
+        redis_client.setex(
+            f"pending_confirmation:{order_id}",
+            CONFIRMATION_TTL_SECONDS,
+            order_json,
+        ),
+        bolna.make_outbound_call(
             phone=phone,
-            agent_id=settings.bolna_confirmation_agent_id,
+            agent_id=agent_id,
             context=context,
-        )
-        
-        call_id = result.get("call_id")
-        logger.info(f"Outbound call initiated for order {payload.order_id}: {call_id}")
-        
-        # Store call_id -> order_id mapping in Redis for O(1) lookup
-        # when call-complete webhook arrives
-        if call_id:
+        ),
+        return_exceptions=True,
+    )
+
+    if isinstance(stored, Exception):
+        logger.error("Failed to store pending confirmation for order %s: %s", order_id, stored)
+
+    if isinstance(result, Exception):
+        if isinstance(result, BolnaAPIError):
+            logger.error("Failed to initiate confirmation call for order %s: %s", order_id, result)
+        else:
+            logger.error("Error initiating confirmation call for order %s: %s", order_id, result)
+        await _set_call_status(redis_client, order_id, {"status": "failed", "error": str(result)})
+        try:
+            await redis_client.delete(f"pending_confirmation:{order_id}")
+        except Exception as e:
+            logger.error("Failed to clear pending confirmation for order %s: %s", order_id, e)
+        await idempotency.release()
+        return
+
+    call_id = result.get("call_id")
+    logger.info("Outbound call initiated for order %s: %s", order_id, call_id)
+    await _set_call_status(redis_client, order_id, {"status": "initiated", "call_id": call_id})
+
+    # Store call_id -> order_id mapping in Redis for O(1) lookup
+    # when call-complete webhook arrives
+    if call_id:
+        try:
             await redis_client.setex(
                 f"confirmation_call:{call_id}",
-                3600,  # 1 hour TTL (same as pending_confirmation)
-                payload.order_id,
+                CONFIRMATION_TTL_SECONDS,  # Same TTL as pending_confirmation
+                order_id,
             )
-        
-        return {
-            "status": "ok",
-            "message": f"Confirmation call initiated for order {payload.order_id}",
-            "order_id": payload.order_id,
-            "call_id": call_id,
-            "phone": payload.phone,
-        }
-        
-    except BolnaAPIError as e:
-        logger.error(f"Failed to initiate confirmation call: {e}")
-        return {
-            "status": "error",
-            "message": str(e),
-            "order_id": payload.order_id,
-        }
-    except Exception as e:
-        logger.error(f"Error initiating confirmation call: {e}")
-        return {
-            "status": "error",
-            "message": str(e),
-            "order_id": payload.order_id,
-        }
-
+        except Exception as e:
+            logger.error("Failed to store confirmation call mapping for order %s: %s", order_id, e)
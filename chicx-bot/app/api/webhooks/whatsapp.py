@@ -7,22 +7,29 @@ This module handles:
 Reference: https://developers.facebook.com/docs/whatsapp/cloud-api/webhooks
 """
 
+import asyncio
+import hmac
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Header, HTTPException, Query, Request
+import redis.asyncio as redis
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Query, Request
 from fastapi.responses import PlainTextResponse
 from pydantic import ValidationError
 
-from app.api.deps import DbSession, RedisClient
+from app.api.deps import RedisClient
 from app.config import get_settings
-from app.schemas.whatsapp import WhatsAppWebhookPayload
+from app.db.session import async_session_maker
+from app.schemas.whatsapp import Message, Status, WhatsAppWebhookPayload
 from app.services.whatsapp import WhatsAppService
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/webhooks/whatsapp", tags=["WhatsApp"])
 
+# Meta caps webhook payloads at 3 MB (media is referenced by ID, not inlined)
+MAX_WEBHOOK_BYTES = 3 * 1024 * 1024
+
 
 # ============================================================================
 # GET - Webhook Verification
@@ -78,7 +85,7 @@ async def verify_webhook(
         )
 
     # Verify token matches our configured token
-    if hub_verify_token != settings.whatsapp_verify_token:
+    if not hmac.compare_digest(hub_verify_token.encode(), settings.whatsapp_verify_token_bytes):
         logger.warning("Webhook verification token mismatch")
         raise HTTPException(
             status_code=403,
@@ -94,10 +101,30 @@ async def verify_webhook(
 # ============================================================================
 
 
+async def _read_body_capped(request: Request) -> bytes:
+    """Read the request body, stopping once it exceeds MAX_WEBHOOK_BYTES.
+
+    Chunked requests carry no Content-Length, so the cap is also enforced
+    while streaming instead of trusting the header alone.
+
+    Raises:
+        HTTPException: 413 if the body exceeds MAX_WEBHOOK_BYTES
+    """
+    chunks: list[bytes] = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_WEBHOOK_BYTES:
+            logger.warning(f"Rejected oversized webhook body: over {MAX_WEBHOOK_BYTES} bytes streamed")
+            raise HTTPException(status_code=413, detail="Payload too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
 @router.post("", status_code=200)
 async def receive_webhook(
     request: Request,
-    db: DbSession,
+    background: BackgroundTasks,
     redis_client: RedisClient,
     x_hub_signature_256: Annotated[str | None, Header()] = None,
 ) -> dict[str, str]:
@@ -116,7 +143,7 @@ async def receive_webhook(
 
     Args:
         request: FastAPI request object
-        db: Database session (injected)
+        background: Background tasks that process the events after responding
         redis_client: Redis client (injected)
         x_hub_signature_256: HMAC SHA256 signature header
 
@@ -124,39 +151,47 @@ async def receive_webhook(
         Simple acknowledgment response
 
     Raises:
+        HTTPException: 413 if the body exceeds MAX_WEBHOOK_BYTES
         HTTPException: 403 if signature verification fails
-        HTTPException: 400 if payload is invalid
+        HTTPException: 400 if payload or Content-Length is invalid
     """
     settings = get_settings()
 
+    # Reject oversized bodies before buffering them or computing the HMAC
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            declared_bytes = int(content_length)
+        except ValueError:
+            logger.warning(f"Rejected webhook with invalid Content-Length: {content_length!r}")
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if declared_bytes > MAX_WEBHOOK_BYTES:
+            logger.warning(f"Rejected oversized webhook body: {content_length} bytes")
+            raise HTTPException(status_code=413, detail="Payload too large")
+
     # Read raw body for signature verification
-    raw_body = await request.body()
+    raw_body = await _read_body_capped(request)
 
     # Verify signature in production
     if settings.whatsapp_app_secret:
-        service = WhatsAppService(db=db, redis_client=redis_client)
-        
         # Log signature details for debugging
         logger.info(f"Verifying signature: header={x_hub_signature_256[:30] if x_hub_signature_256 else 'None'}...")
         logger.info(f"Payload size: {len(raw_body)} bytes")
         
-        if not service.verify_webhook_signature(raw_body, x_hub_signature_256 or ""):
+        if not WhatsAppService.verify_webhook_signature(raw_body, x_hub_signature_256 or ""):
             logger.error("Webhook signature verification failed")
             logger.error(f"App Secret (first 8): {settings.whatsapp_app_secret[:8]}...")
             logger.error(f"Signature header: {x_hub_signature_256}")
-            await service.close()
             raise HTTPException(
                 status_code=403,
                 detail="Invalid webhook signature",
             )
         
         logger.info("✅ Signature verification successful")
-        await service.close()
 
-    # Parse payload
+    # Parse and validate the body we already read in one pass
     try:
-        payload_dict = await request.json()
-        payload = WhatsAppWebhookPayload.model_validate(payload_dict)
+        payload = WhatsAppWebhookPayload.model_validate_json(raw_body)
     except ValidationError as e:
         logger.error(f"Invalid webhook payload: {e}")
         raise HTTPException(
@@ -170,14 +205,23 @@ async def receive_webhook(
             detail="Failed to parse payload",
         )
 
+    # Drop repeats of the same message within one delivery (first one wins)
+    all_messages = payload.get_messages()
+    unique_messages: dict[str, Message] = {}
+    for message in all_messages:
+        unique_messages.setdefault(message.id, message)
+    messages = list(unique_messages.values())
+    statuses = payload.get_statuses()
+
     # Log webhook info
-    message_count = len(payload.get_messages())
-    status_count = len(payload.get_statuses())
+    message_count = len(messages)
+    status_count = len(statuses)
     phone_number_id = payload.get_phone_number_id()
 
     logger.info(
         f"Webhook received: phone_number_id={phone_number_id}, "
-        f"messages={message_count}, statuses={status_count}"
+        f"messages={message_count}, statuses={status_count}, "
+        f"duplicates_dropped={len(all_messages) - message_count}"
     )
 
     # Verify this is for our phone number
@@ -189,28 +233,79 @@ async def receive_webhook(
         # Still return 200 to acknowledge receipt
         return {"status": "ignored"}
 
-    # Process messages and statuses
+    # Process messages and statuses after the response is sent, so slow LLM
+    # calls never push the acknowledgment past Meta's retry timeout
     if message_count > 0 or status_count > 0:
+        background.add_task(
+            _process_webhook_events,
+            redis_client,
+            messages,
+            statuses,
+        )
+
+    return {"status": "ok"}
+
+
+async def _process_webhook_events(
+    redis_client: redis.Redis,
+    messages: list[Message],
+    statuses: list[Status],
+) -> None:
+    """Process webhook messages and statuses in the background.
+
+    Messages from different senders are independent, so each sender's
+    messages are processed concurrently in their own session. Messages from
+    the same sender stay sequential to keep the conversation in order.
+    """
+    by_sender: dict[str, list[Message]] = {}
+    for message in messages:
+        by_sender.setdefault(message.sender_phone, []).append(message)
+
+    batches = [
+        _process_event_batch(redis_client, sender_messages, [])
+        for sender_messages in by_sender.values()
+    ]
+    if statuses:
+        batches.append(_process_event_batch(redis_client, [], statuses))
+
+    await asyncio.gather(*batches)
+
+
+async def _process_event_batch(
+    redis_client: redis.Redis,
+    messages: list[Message],
+    statuses: list[Status],
+) -> None:
+    """Process a batch of webhook events sequentially in one database session.
+
+    Runs after the response has been sent, so it opens its own database
+    session instead of using the (already closed) request session. Errors
+    are logged, never raised.
+    """
+    async with async_session_maker() as db:
         service = WhatsAppService(db=db, redis_client=redis_client)
         try:
             # Process messages
-            for message in payload.get_messages():
+            for message in messages:
                 try:
                     await service.process_message(message)
                 except Exception as e:
                     logger.exception(f"Error processing message {message.id}: {e}")
 
             # Process statuses (these are quick)
-            for status in payload.get_statuses():
+            for status in statuses:
                 try:
                     await service.process_status_update(status)
                 except Exception as e:
                     logger.exception(f"Error processing status {status.id}: {e}")
+
+            await db.commit()
+        except Exception as e:
+            logger.exception(f"Failed to save webhook events: {e}")
+            await db.rollback()
         finally:
             await service.close()
 
-    return {"status": "ok"}
-
 
 # ============================================================================
 # Health Check for Webhook
@@ -225,3 +320,4 @@ async def webhook_health() -> dict[str, str]:
         Simple health status
     """
     return {"status": "healthy", "service": "whatsapp-webhook"}
+
@@ -2,6 +2,7 @@
 
 This module provides the core AI/ML infrastructure for the CHICX WhatsApp bot:
 - OpenRouter LLM client for natural language processing
+- Exact-match and semantic caches for deterministic (temperature 0) completions
 - Tool definitions for function calling
 - System prompts for bot behavior
 """
@@ -16,6 +17,7 @@ from app.core.llm import (
     get_llm_client,
     shutdown_llm_client,
 )
+from app.core.llm_cache import LLMCache, SemanticLLMCache
 from app.core.tools import (
     TOOL_DEFINITIONS,
     ToolName,
@@ -27,9 +29,13 @@ from app.core.tools import (
 )
 from app.core.prompts import (
     WHATSAPP_SYSTEM_PROMPT,
+    WHATSAPP_PROMPT_SECTIONS,
     ERROR_RESPONSES,
     ORDER_STATUS_DESCRIPTIONS,
     get_system_prompt,
+    get_system_message,
+    build_messages,
+    get_prompt_cache_key,
     get_error_response,
     get_order_status_description,
 )
@@ -44,6 +50,8 @@ __all__ = [
     "LLMResponseError",
     "get_llm_client",
     "shutdown_llm_client",
+    "LLMCache",
+    "SemanticLLMCache",
     # Tools
     "TOOL_DEFINITIONS",
     "ToolName",
@@ -54,9 +62,13 @@ __all__ = [
     "TOOL_RESPONSE_SCHEMAS",
     # Prompts
     "WHATSAPP_SYSTEM_PROMPT",
+    "WHATSAPP_PROMPT_SECTIONS",
     "ERROR_RESPONSES",
     "ORDER_STATUS_DESCRIPTIONS",
     "get_system_prompt",
+    "get_system_message",
+    "build_messages",
+    "get_prompt_cache_key",
     "get_error_response",
     "get_order_status_description",
 ]
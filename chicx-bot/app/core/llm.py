@@ -4,12 +4,18 @@ This module provides an async client for interacting with OpenRouter API,
 which provides access to multiple LLM providers with an OpenAI-compatible interface.
 """
 
-import json
+import asyncio
 import logging
+import time
+from collections.abc import AsyncIterator, Sequence
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 from typing import Any
 
 import httpx
+import orjson
 from tenacity import (
+    RetryCallState,
     retry,
     stop_after_attempt,
     wait_exponential,
@@ -18,6 +24,8 @@ from tenacity import (
 )
 
 from app.config import get_settings
+from app.core.llm_cache import LLMCache, SemanticLLMCache
+from app.core.tools import get_tool_definitions, get_tool_definitions_json
 
 logger = logging.getLogger(__name__)
 
@@ -33,8 +41,15 @@ class LLMConnectionError(LLMError):
 
 
 class LLMRateLimitError(LLMError):
-    """Raised when rate limit is exceeded."""
-    pass
+    """Raised when rate limit is exceeded.
+
+    Attributes:
+        retry_after: Seconds the server asked us to wait, if it said.
+    """
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class LLMResponseError(LLMError):
@@ -42,6 +57,53 @@ class LLMResponseError(LLMError):
     pass
 
 
+# Transient failures that chat_completion retries
+RETRIABLE_ERRORS = (httpx.ConnectError, httpx.TimeoutException, LLMRateLimitError)
+
+# Upper bound on any single retry sleep, including server-provided Retry-After
+MAX_RETRY_WAIT_SECONDS = 30
+
+# Distinct tool lists whose JSON encoding is kept (normally just one)
+TOOLS_JSON_CACHE_MAX_SIZE = 16
+
+_exponential_wait = wait_exponential(multiplier=1, min=2, max=MAX_RETRY_WAIT_SECONDS)
+
+
+def _parse_retry_after(headers: httpx.Headers) -> float | None:
+    """Read how long to back off from a 429 response's headers.
+
+    Supports Retry-After as delta-seconds or an HTTP date, falling back to
+    OpenRouter's X-RateLimit-Reset (Unix epoch milliseconds).
+    """
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                reset_at = parsedate_to_datetime(value)
+                return max(0.0, (reset_at - datetime.now(UTC)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    reset_ms = headers.get("x-ratelimit-reset")
+    if reset_ms:
+        try:
+            return max(0.0, int(reset_ms) / 1000 - time.time())
+        except ValueError:
+            pass
+
+    return None
+
+
+def _wait_retry_after_or_exponential(retry_state: RetryCallState) -> float:
+    """Sleep for the server's Retry-After if given, else back off exponentially."""
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, LLMRateLimitError) and exc.retry_after is not None:
+        return min(exc.retry_after, MAX_RETRY_WAIT_SECONDS)
+    return _exponential_wait(retry_state)
+
+
 class OpenRouterClient:
     """Async client for OpenRouter API.
 
@@ -65,8 +127,38 @@ class OpenRouterClient:
         self._api_key = settings.openrouter_api_key
         self._model = settings.openrouter_model or "google/gemini-2.0-flash-001"
         self._base_url = "https://openrouter.ai/api/v1"
-        self._client = httpx.AsyncClient(timeout=60.0)
+        # One persistent HTTP/2 client: concurrent completions multiplex over
+        # a single TLS connection instead of handshaking per request
+        self._client = httpx.AsyncClient(
+            http2=True,
+            base_url=self._base_url,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=60.0,
+            ),
+            headers={
+                "Authorization": f"Bearer {self._api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://chicx.in",
+                "X-Title": "CHICX WhatsApp Bot",
+            },
+        )
         self._settings = settings
+        self._cache = LLMCache()
+        self._tools_json: dict[tuple[int, ...], tuple[list[dict[str, Any]], bytes]] = {}
+        # Seed with the bot's own tool set, already encoded at import
+        bot_tools = get_tool_definitions()
+        self._tools_json[tuple(map(id, bot_tools))] = (
+            list(bot_tools),
+            get_tool_definitions_json(),
+        )
+        self._semantic_cache = (
+            SemanticLLMCache(settings.semantic_cache_threshold)
+            if settings.semantic_cache_enabled
+            else None
+        )
 
     @property
     def model(self) -> str:
@@ -74,20 +166,21 @@ class OpenRouterClient:
         return self._model
 
     @retry(
-        retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException, LLMRateLimitError)),
+        retry=retry_if_exception_type(RETRIABLE_ERRORS),
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=30),
+        wait=_wait_retry_after_or_exponential,
         before_sleep=before_sleep_log(logger, logging.WARNING),
         reraise=True,
     )
     async def chat_completion(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None = None,
+        tools: Sequence[dict[str, Any]] | None = None,
         tool_choice: str | dict[str, Any] | None = None,
         temperature: float = 0.7,
         max_tokens: int = 1024,
         stream: bool = False,
+        prompt_cache_key: str | None = None,
     ) -> dict[str, Any]:
         """Send a chat completion request to OpenRouter.
 
@@ -97,7 +190,11 @@ class OpenRouterClient:
             tool_choice: Optional tool choice strategy.
             temperature: Sampling temperature (0.0-2.0). Default 0.7.
             max_tokens: Maximum tokens in response. Default 1024.
-            stream: Whether to stream the response. Default False (not implemented).
+            stream: Whether to stream the response. Default False (not
+                implemented here - use chat_completion_stream()).
+            prompt_cache_key: Optional key routing requests that share a
+                system prompt to the same provider cache. Only sent to
+                OpenAI models, which are the ones that accept it.
 
         Returns:
             dict containing the API response with the following structure:
@@ -113,17 +210,39 @@ class OpenRouterClient:
             LLMRateLimitError: If rate limit is exceeded.
             LLMResponseError: If API returns an unexpected response.
             LLMError: For other API errors.
-        """
-        try:
-            url = f"{self._base_url}/chat/completions"
 
-            headers = {
-                "Authorization": f"Bearer {self._api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://chicx.in",
-                "X-Title": "CHICX WhatsApp Bot",
-            }
+        Note:
+            Requests made with temperature 0 (and stream=False) are served
+            from an in-process exact-match cache when an identical request
+            was answered within the last hour. With SEMANTIC_CACHE_ENABLED,
+            tool-free requests also match paraphrases of the last user
+            message when everything before it (model, history, max_tokens)
+            is identical.
+        """
+        cache_key = None
+        if not stream:
+            cache_key = LLMCache.cache_key(
+                self._model, messages, temperature, tools, tool_choice, max_tokens
+            )
+        if cache_key is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.debug("LLM cache hit", extra=self._cache.stats)
+                return cached
+
+        semantic_cache = self._semantic_cache
+        semantic_scope = None
+        query_embedding = None
+        if cache_key is not None and semantic_cache is not None and not tools:
+            query_embedding = await self._embed_last_user_message(messages)
+            if query_embedding is not None:
+                semantic_scope = SemanticLLMCache.scope_key(self._model, messages, max_tokens)
+                cached = semantic_cache.get(semantic_scope, query_embedding)
+                if cached is not None:
+                    logger.debug("LLM semantic cache hit", extra=semantic_cache.stats)
+                    return cached
 
+        try:
             request_body: dict[str, Any] = {
                 "model": self._model,
                 "messages": messages,
@@ -131,31 +250,43 @@ class OpenRouterClient:
                 "max_tokens": max_tokens,
             }
 
+            if tools and tool_choice:
+                request_body["tool_choice"] = tool_choice
+
+            if prompt_cache_key and self._model.startswith("openai/"):
+                request_body["prompt_cache_key"] = prompt_cache_key
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Sending chat completion request to OpenRouter",
+                    extra={
+                        "model": self._model,
+                        "message_count": len(messages),
+                        "has_tools": bool(tools),
+                    },
+                )
+
+            # orjson encodes straight to bytes, much faster than httpx's stdlib
+            # json for long system prompts and tool schemas
+            body = orjson.dumps(request_body)
             if tools:
-                request_body["tools"] = tools
-                if tool_choice:
-                    request_body["tool_choice"] = tool_choice
-
-            logger.debug(
-                "Sending chat completion request to OpenRouter",
-                extra={
-                    "model": self._model,
-                    "message_count": len(messages),
-                    "has_tools": bool(tools),
-                },
-            )
+                # Splice in the pre-encoded tool schema (same on every turn)
+                body = body[:-1] + b',"tools":' + self._encode_tools(tools) + b"}"
 
-            response = await self._client.post(url, headers=headers, json=request_body)
+            response = await self._client.post("/chat/completions", content=body)
 
             if response.status_code == 429:
-                raise LLMRateLimitError("OpenRouter API rate limit exceeded")
+                raise LLMRateLimitError(
+                    "OpenRouter API rate limit exceeded",
+                    retry_after=_parse_retry_after(response.headers),
+                )
 
             if response.status_code != 200:
                 error_text = response.text
                 logger.error(f"OpenRouter API error: {response.status_code} - {error_text}")
                 raise LLMError(f"OpenRouter API error: {response.status_code} - {error_text}")
 
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # Extract response (OpenAI format)
             result = {
@@ -182,15 +313,26 @@ class OpenRouterClient:
                     result["tool_calls"] = message["tool_calls"]
                     result["finish_reason"] = "tool_calls"
 
-            logger.debug(
-                "Chat completion successful",
-                extra={
-                    "finish_reason": result["finish_reason"],
-                    "has_content": bool(result["content"]),
-                    "tool_call_count": len(result["tool_calls"]) if result["tool_calls"] else 0,
-                    "total_tokens": result["usage"].get("total_tokens", 0),
-                },
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Chat completion successful",
+                    extra={
+                        "finish_reason": result["finish_reason"],
+                        "has_content": bool(result["content"]),
+                        "tool_call_count": len(result["tool_calls"]) if result["tool_calls"] else 0,
+                        "total_tokens": result["usage"].get("total_tokens", 0),
+                    },
+                )
+
+            if cache_key is not None:
+                self._cache.set(cache_key, result)
+            if (
+                semantic_cache is not None
+                and semantic_scope is not None
+                and query_embedding is not None
+                and result["finish_reason"] == "stop"
+            ):
+                semantic_cache.set(semantic_scope, query_embedding, result)
 
             return result
 
@@ -206,13 +348,130 @@ class OpenRouterClient:
             logger.exception(f"Unexpected error in chat completion: {e}")
             raise LLMResponseError(f"Unexpected error: {e}") from e
 
+    async def chat_completion_stream(
+        self,
+        messages: list[dict[str, Any]],
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[str]:
+        """Stream a tool-free chat completion as text deltas.
+
+        Uses OpenRouter's server-sent events so callers can act on the first
+        tokens instead of waiting for the whole generation. Tool calling is
+        not supported on this path; use chat_completion() for that.
+
+        Args:
+            messages: List of message objects with role and content.
+            temperature: Sampling temperature (0.0-2.0). Default 0.7.
+            max_tokens: Maximum tokens in response. Default 1024.
+
+        Yields:
+            Content deltas in the order they are generated.
+
+        Raises:
+            LLMConnectionError: If connection to API fails or the stream drops.
+            LLMRateLimitError: If rate limit is exceeded.
+            LLMResponseError: If a stream chunk is not valid JSON.
+            LLMError: For other API errors.
+        """
+        body = orjson.dumps({
+            "model": self._model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        })
+
+        try:
+            async with self._client.stream("POST", "/chat/completions", content=body) as response:
+                if response.status_code == 429:
+                    raise LLMRateLimitError(
+                        "OpenRouter API rate limit exceeded",
+                        retry_after=_parse_retry_after(response.headers),
+                    )
+                if response.status_code != 200:
+                    error_text = (await response.aread()).decode(errors="replace")
+                    logger.error(f"OpenRouter API error: {response.status_code} - {error_text}")
+                    raise LLMError(f"OpenRouter API error: {response.status_code} - {error_text}")
+
+                async for line in response.aiter_lines():
+                    # SSE: skip blank separators and ": OPENROUTER PROCESSING" comments
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = orjson.loads(data)
+                    except orjson.JSONDecodeError as e:
+                        logger.error(f"Malformed SSE chunk from OpenRouter API: {data[:200]!r}")
+                        raise LLMResponseError(f"Malformed stream chunk: {e}") from e
+                    choices = chunk.get("choices") or []
+                    if choices:
+                        delta = choices[0].get("delta", {}).get("content")
+                        if delta:
+                            yield delta
+        except httpx.ConnectError as e:
+            logger.error(f"Connection error to OpenRouter API: {e}")
+            raise LLMConnectionError(f"Failed to connect to OpenRouter API: {e}") from e
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout connecting to OpenRouter API: {e}")
+            raise LLMConnectionError(f"Timeout connecting to OpenRouter API: {e}") from e
+        except httpx.HTTPError as e:
+            # ReadError / RemoteProtocolError when the stream drops mid-response
+            logger.error(f"OpenRouter stream interrupted: {e}")
+            raise LLMConnectionError(f"OpenRouter stream interrupted: {e}") from e
+
+    def _encode_tools(self, tools: Sequence[dict[str, Any]]) -> bytes:
+        """Serialize a tool list, reusing the bytes across requests.
+
+        Callers pass (copies of) the same tool definitions on every turn, so
+        the cache is keyed on the identities of the definition dicts. Each
+        entry holds references to those dicts, so their ids cannot be reused
+        by other objects while cached.
+        """
+        key = tuple(map(id, tools))
+        entry = self._tools_json.get(key)
+        if entry is None:
+            if len(self._tools_json) >= TOOLS_JSON_CACHE_MAX_SIZE:
+                self._tools_json.clear()
+            entry = (list(tools), orjson.dumps(tools))
+            self._tools_json[key] = entry
+        return entry[1]
+
+    async def _embed_last_user_message(
+        self, messages: list[dict[str, Any]]
+    ) -> list[float] | None:
+        """Embed the last user message for the semantic cache.
+
+        Returns None when there is no plain-text user message or the
+        embedding call fails, in which case the cache is simply bypassed.
+        """
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        content = messages[-1].get("content")
+        if not isinstance(content, str) or not content.strip():
+            return None
+
+        # Imported lazily: app.services depends on app.core, not the reverse
+        from app.services.embedding import generate_embedding
+
+        try:
+            return await generate_embedding(content)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed, bypassing cache: {e}")
+            return None
+
     async def chat_with_tools(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]],
+        tools: Sequence[dict[str, Any]],
         tool_executor: "ToolExecutor",
         max_iterations: int = 5,
         temperature: float = 0.7,
+        *,
+        copy_messages: bool = True,
+        prompt_cache_key: str | None = None,
     ) -> dict[str, Any]:
         """Execute a conversation with automatic tool calling.
 
@@ -226,6 +485,11 @@ class OpenRouterClient:
             tool_executor: Callable that executes tools and returns results.
             max_iterations: Maximum tool calling iterations. Default 5.
             temperature: Sampling temperature. Default 0.7.
+            copy_messages: Copy `messages` before appending tool turns.
+                Pass False when the caller built a fresh list it won't reuse;
+                the list is then mutated in place.
+            prompt_cache_key: Passed through to chat_completion() on every
+                iteration.
 
         Returns:
             dict with final response including:
@@ -239,7 +503,10 @@ class OpenRouterClient:
         Raises:
             LLMError: If an error occurs during the conversation.
         """
-        conversation = list(messages)  # Copy to avoid mutation
+        conversation = list(messages) if copy_messages else messages
+        # Cap in-flight tools per conversation so a turn with many tool calls
+        # cannot flood the CHICX API or the database
+        tool_limit = asyncio.Semaphore(self._settings.max_parallel_tools)
         tool_calls_made: list[dict[str, Any]] = []
         total_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
         iterations = 0
@@ -251,14 +518,22 @@ class OpenRouterClient:
                 messages=conversation,
                 tools=tools if iterations < max_iterations else None,
                 temperature=temperature,
+                prompt_cache_key=prompt_cache_key,
             )
 
             # Aggregate token usage
-            for key in total_usage:
-                total_usage[key] += response["usage"].get(key, 0)
+            usage = response["usage"]
+            total_usage["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            total_usage["completion_tokens"] += usage.get("completion_tokens", 0)
+            total_usage["total_tokens"] += usage.get("total_tokens", 0)
 
             # Check if we have tool calls to execute
             if response["tool_calls"]:
+                if iterations == max_iterations:
+                    # Tools were withheld on this final call, so results could
+                    # never be sent back to the model - don't execute them
+                    break
+
                 # Add assistant message with tool calls
                 conversation.append({
                     "role": "assistant",
@@ -266,18 +541,32 @@ class OpenRouterClient:
                     "tool_calls": response["tool_calls"],
                 })
 
-                # Execute each tool and add results
+                # Parse arguments up front, then run the tools concurrently -
+                # they are independent I/O calls (CHICX API, FAQ search)
+                parsed_calls = []
                 for tool_call in response["tool_calls"]:
                     tool_name = tool_call["function"]["name"]
                     try:
-                        arguments = json.loads(tool_call["function"]["arguments"])
-                    except json.JSONDecodeError:
+                        arguments = orjson.loads(tool_call["function"]["arguments"])
+                    except orjson.JSONDecodeError:
                         arguments = {}
 
                     logger.info(f"Executing tool: {tool_name}", extra={"arguments": arguments})
-
-                    # Execute the tool
-                    result = await tool_executor.execute(tool_name, arguments)
+                    parsed_calls.append((tool_call, tool_name, arguments))
+
+                results = await asyncio.gather(
+                    *(
+                        self._execute_tool_bounded(tool_executor, tool_limit, tool_name, arguments)
+                        for _, tool_name, arguments in parsed_calls
+                    ),
+                    return_exceptions=True,
+                )
+
+                # Record results in the original tool_calls order
+                for (tool_call, tool_name, arguments), result in zip(parsed_calls, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Tool {tool_name} raised: {result}")
+                        result = {"error": f"Failed to execute {tool_name}: {result}"}
 
                     tool_calls_made.append({
                         "name": tool_name,
@@ -289,7 +578,11 @@ class OpenRouterClient:
                     conversation.append({
                         "role": "tool",
                         "tool_call_id": tool_call["id"],
-                        "content": json.dumps(result) if isinstance(result, dict) else str(result),
+                        "content": (
+                            orjson.dumps(result, default=str).decode()
+                            if isinstance(result, dict)
+                            else str(result)
+                        ),
                     })
             else:
                 # No tool calls - we have a final response
@@ -309,6 +602,17 @@ class OpenRouterClient:
             "usage": total_usage,
         }
 
+    @staticmethod
+    async def _execute_tool_bounded(
+        tool_executor: "ToolExecutor",
+        tool_limit: asyncio.Semaphore,
+        tool_name: str,
+        arguments: dict[str, Any],
+    ) -> Any:
+        """Execute one tool while holding a slot of the per-turn semaphore."""
+        async with tool_limit:
+            return await tool_executor.execute(tool_name, arguments)
+
     async def close(self) -> None:
         """Close the client and release resources."""
         await self._client.aclose()
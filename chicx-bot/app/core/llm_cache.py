@@ -0,0 +1,206 @@
+"""In-process caches for deterministic LLM completions.
+
+Only requests made at temperature 0 are cached: for those, an identical
+(model, messages, tools, ...) payload is expected to produce the same
+answer, so the network round-trip and token generation can be skipped.
+
+- LLMCache: exact match on the canonical request
+- SemanticLLMCache: nearest neighbour on the last user message embedding,
+  within requests that share everything else (model, earlier messages,
+  max_tokens), catching paraphrases of tool-free prompts
+"""
+
+import copy
+import hashlib
+import logging
+import math
+import operator
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_MAX_SIZE = 1024
+LLM_CACHE_TTL_SECONDS = 3600  # 1 hour
+
+# Lookups are a linear scan in pure Python, so keep the semantic cache small
+SEMANTIC_CACHE_MAX_SIZE = 256
+
+
+class LLMCache:
+    """Bounded LRU cache with per-entry TTL for chat completion results.
+
+    Entries are stored and returned as deep copies so callers can mutate
+    the result (e.g. append tool calls to a conversation) without
+    corrupting the cache. All operations are synchronous, so no lock is
+    needed under asyncio.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = LLM_CACHE_MAX_SIZE,
+        ttl: float = LLM_CACHE_TTL_SECONDS,
+    ) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def cache_key(
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float,
+        tools: Sequence[dict[str, Any]] | None = None,
+        tool_choice: str | dict[str, Any] | None = None,
+        max_tokens: int | None = None,
+    ) -> str | None:
+        """Build a cache key for a request, or None if it is not cacheable.
+
+        Args:
+            model: Model identifier
+            messages: Chat messages
+            temperature: Sampling temperature; only 0 is cacheable
+            tools: Tool definitions, if any
+            tool_choice: Tool choice strategy, if any
+            max_tokens: Completion token limit
+
+        Returns:
+            SHA-256 hex digest of the canonical request, or None when
+            temperature > 0.
+        """
+        if temperature > 0:
+            return None
+        canonical = orjson.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "tools": tools,
+                "tool_choice": tool_choice,
+                "max_tokens": max_tokens,
+            },
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(canonical).hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return a copy of the cached result, or None on miss/expiry."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: str, result: dict[str, Any]) -> None:
+        """Store a copy of a result, evicting the least recently used entry."""
+        self._entries[key] = (time.monotonic() + self._ttl, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries and reset statistics."""
+        self._entries.clear()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticLLMCache:
+    """Similarity cache keyed by the embedding of the last user message.
+
+    Entries are scoped by a hash of the rest of the request (see scope_key),
+    so a hit never returns a completion generated under a different model,
+    system prompt or conversation history. Vectors are L2-normalized on
+    insert so cosine similarity is a plain dot product. Entries are evicted
+    oldest-first once maxsize is reached.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        maxsize: int = SEMANTIC_CACHE_MAX_SIZE,
+        ttl: float = LLM_CACHE_TTL_SECONDS,
+    ) -> None:
+        self._threshold = threshold
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: list[tuple[float, str, list[float], dict[str, Any]]] = []
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def scope_key(
+        model: str,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+    ) -> str:
+        """Hash everything in a request except the last message.
+
+        Args:
+            model: Model identifier
+            messages: Chat messages; the last one is the query being embedded
+            max_tokens: Completion token limit
+
+        Returns:
+            SHA-256 hex digest of the canonical request prefix.
+        """
+        canonical = orjson.dumps(
+            {"model": model, "messages": messages[:-1], "max_tokens": max_tokens},
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(canonical).hexdigest()
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> list[float]:
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+    def get(self, scope: str, embedding: list[float]) -> dict[str, Any] | None:
+        """Return a copy of the most similar cached result in scope above threshold."""
+        now = time.monotonic()
+        self._entries = [entry for entry in self._entries if entry[0] >= now]
+
+        query = self._normalize(embedding)
+        best_score, best_result = -1.0, None
+        for _, entry_scope, vector, result in self._entries:
+            if entry_scope != scope:
+                continue
+            score = sum(map(operator.mul, query, vector))
+            if score > best_score:
+                best_score, best_result = score, result
+
+        if best_result is None or best_score < self._threshold:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return copy.deepcopy(best_result)
+
+    def set(self, scope: str, embedding: list[float], result: dict[str, Any]) -> None:
+        """Store a copy of a result, evicting the oldest entry at capacity."""
+        self._entries.append(
+            (
+                time.monotonic() + self._ttl,
+                scope,
+                self._normalize(embedding),
+                copy.deepcopy(result),
+            )
+        )
+        if len(self._entries) > self._maxsize:
+            del self._entries[0]
+
+    def clear(self) -> None:
+        """Drop all entries and reset statistics."""
+        self._entries.clear()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
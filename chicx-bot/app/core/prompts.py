@@ -9,11 +9,23 @@ Key characteristics:
 - Friendly, helpful tone representing the CHICX brand
 - Multilingual: English, Tamil (Tanglish), Malayalam (Manglish), Hindi (Hinglish)
 - RAG-powered: Uses FAQ embeddings for detailed product/policy information
+
+Prompt caching invariant: providers cache contiguous prompt *prefixes*, so
+the system prompt must stay static and always be message 0. Per-user data
+(conversation history, tool results, order context) goes in later messages,
+never interpolated into WHATSAPP_SYSTEM_PROMPT. Use build_messages().
 """
 
+import hashlib
+from functools import lru_cache
+from typing import Any
 
-# Main system prompt for the WhatsApp bot assistant
-WHATSAPP_SYSTEM_PROMPT = """You are CHICX Assistant, a friendly and helpful AI customer service representative for CHICX, a Direct-to-Consumer (D2C) demi-fine jewelry e-commerce brand in India.
+# The WhatsApp system prompt is kept as ordered sections, most stable first.
+# Each section is its own cache breakpoint (see _build_system_content), so
+# editing a later section does not invalidate the cached earlier ones.
+
+# Identity, capabilities and read-only limitations
+WHATSAPP_PROMPT_CORE = """You are CHICX Assistant, a friendly and helpful AI customer service representative for CHICX, a Direct-to-Consumer (D2C) demi-fine jewelry e-commerce brand in India.
 
 ## Your Identity
 - Name: CHICX Assistant
@@ -40,9 +52,10 @@ You can help customers with:
 When customers want to buy something, ALWAYS direct them to the CHICX website with the product URL. Say something like:
 - "I'd love to help you purchase this! Please visit [product_url] to add it to your cart and complete your order."
 - "Great choice! You can buy this at thechicx.com - I'll share the direct link for you."
-- "You can place your order directly on our website at thechicx.com"
+- "You can place your order directly on our website at thechicx.com\""""
 
-## Language Guidelines
+# Language, conversation and tool usage guidelines
+WHATSAPP_PROMPT_GUIDELINES = """## Language Guidelines
 
 ### Language Detection & Response
 - If the customer messages in Tamil script, respond in Tamil
@@ -146,9 +159,10 @@ Use search_products ONLY when customer wants to:
 4. **get_order_history**: When customer wants to see past orders
    - The user is identified by their WhatsApp phone number
 
-5. **track_shipment**: When customer has an AWB/tracking number for live tracking
+5. **track_shipment**: When customer has an AWB/tracking number for live tracking"""
 
-## Response Format
+# Response format, brand voice and safety rules
+WHATSAPP_PROMPT_STYLE = """## Response Format
 - Keep responses concise - WhatsApp users prefer shorter messages
 - Use emojis sparingly and appropriately (1-2 per message max, ✨ for jewelry)
 - Break long responses into multiple short paragraphs
@@ -170,6 +184,15 @@ Use search_products ONLY when customer wants to:
 
 Remember: Your goal is to provide excellent customer service while guiding users to complete purchases on the CHICX website. Use the FAQ knowledge base for detailed information - don't make up facts!"""
 
+WHATSAPP_PROMPT_SECTIONS = (
+    WHATSAPP_PROMPT_CORE,
+    WHATSAPP_PROMPT_GUIDELINES,
+    WHATSAPP_PROMPT_STYLE,
+)
+
+# Main system prompt for the WhatsApp bot assistant
+WHATSAPP_SYSTEM_PROMPT = "\n\n".join(WHATSAPP_PROMPT_SECTIONS)
+
 
 # NOTE: Voice prompts are configured in Bolna platform, not here.
 # This codebase only handles tool execution via webhooks.
@@ -291,7 +314,21 @@ ORDER_STATUS_DESCRIPTIONS = {
     },
 }
 
+# Flattened (key, language) lookup tables, built once at import so the
+# getters below are a single dict probe on the hot path
+_FLAT_ERRORS: dict[tuple[str, str], str] = {
+    (error_type, lang): text
+    for error_type, responses in ERROR_RESPONSES.items()
+    for lang, text in responses.items()
+}
+_FLAT_ORDER_STATUSES: dict[tuple[str, str], str] = {
+    (status.lower(), lang): text
+    for status, descriptions in ORDER_STATUS_DESCRIPTIONS.items()
+    for lang, text in descriptions.items()
+}
+
 
+@lru_cache(maxsize=4)
 def get_system_prompt(channel: str = "whatsapp") -> str:
     """Get the appropriate system prompt for a channel.
     
@@ -308,6 +345,89 @@ def get_system_prompt(channel: str = "whatsapp") -> str:
     return WHATSAPP_SYSTEM_PROMPT
 
 
+# OpenRouter model prefixes whose providers only cache a prompt prefix when it
+# carries an explicit cache_control breakpoint. OpenAI-family models cache
+# long prefixes automatically and take the plain string.
+CACHE_CONTROL_MODEL_PREFIXES = ("anthropic/", "google/")
+
+
+def get_system_message(channel: str = "whatsapp", model: str = "") -> dict[str, Any]:
+    """Build the system message, marking the static prompt as cacheable.
+
+    The system prompt is identical on every turn, so for providers that
+    support prompt caching it is sent as content blocks, one per prompt
+    section, each with an ephemeral cache_control breakpoint. Subsequent
+    turns then read it from the provider's prompt cache instead of
+    re-processing it, and a prompt edit only invalidates the edited
+    section and the ones after it.
+
+    Args:
+        channel: The channel type - see get_system_prompt()
+        model: OpenRouter model id the message will be sent to
+
+    Returns:
+        A {"role": "system", "content": ...} message dict.
+    """
+    cacheable = model.startswith(CACHE_CONTROL_MODEL_PREFIXES)
+    return {"role": "system", "content": _build_system_content(channel, cacheable)}
+
+
+@lru_cache(maxsize=4)
+def _build_system_content(channel: str, cacheable: bool) -> str | tuple[dict[str, Any], ...]:
+    """Build the system message content once per (channel, cacheable) pair.
+
+    The content is shared across requests, so the block list is a tuple.
+    MappingProxyType would be stricter but orjson cannot serialize it.
+    """
+    if cacheable:
+        return tuple(
+            {"type": "text", "text": section, "cache_control": {"type": "ephemeral"}}
+            for section in WHATSAPP_PROMPT_SECTIONS
+        )
+    return get_system_prompt(channel)
+
+
+# Routing hint for OpenAI prompt caching: requests that share a key are sent
+# to the same cache shard. Derived from the prompt text so any edit rolls it.
+_PROMPT_DIGEST = hashlib.blake2b(WHATSAPP_SYSTEM_PROMPT.encode(), digest_size=8).hexdigest()
+
+
+def get_prompt_cache_key(channel: str = "whatsapp") -> str:
+    """Get the stable prompt cache key for a channel's system prompt.
+
+    Args:
+        channel: The channel type - see get_system_prompt()
+
+    Returns:
+        A key like "chicx-whatsapp-<digest>" that changes with the prompt text.
+    """
+    return f"chicx-{channel}-{_PROMPT_DIGEST}"
+
+
+def build_messages(
+    channel: str,
+    model: str,
+    history: list[dict[str, Any]],
+    user_message: str,
+) -> list[dict[str, Any]]:
+    """Assemble an LLM request with the static prompt first, dynamic data last.
+
+    Args:
+        channel: The channel type - see get_system_prompt()
+        model: OpenRouter model id the messages will be sent to
+        history: Prior conversation turns (per-user, dynamic)
+        user_message: The new user message
+
+    Returns:
+        [system message, *history, user message] - a fresh list the caller owns.
+    """
+    return [
+        get_system_message(channel, model),
+        *history,
+        {"role": "user", "content": user_message},
+    ]
+
+
 def get_error_response(error_type: str, language: str = "en") -> str:
     """Get a localized error response.
 
@@ -318,11 +438,12 @@ def get_error_response(error_type: str, language: str = "en") -> str:
     Returns:
         The localized error message string.
     """
-    if error_type not in ERROR_RESPONSES:
-        error_type = "general_error"
-
-    responses = ERROR_RESPONSES[error_type]
-    return responses.get(language, responses["en"])
+    return (
+        _FLAT_ERRORS.get((error_type, language))
+        or _FLAT_ERRORS.get((error_type, "en"))
+        or _FLAT_ERRORS.get(("general_error", language))
+        or _FLAT_ERRORS["general_error", "en"]
+    )
 
 
 def get_order_status_description(status: str, language: str = "en") -> str:
@@ -335,11 +456,15 @@ def get_order_status_description(status: str, language: str = "en") -> str:
     Returns:
         Human-readable status description in the specified language.
     """
-    status_lower = status.lower()
-    if status_lower not in ORDER_STATUS_DESCRIPTIONS:
-        return f"Order status: {status}"
+    description = _FLAT_ORDER_STATUSES.get((status, language))
+    if description is not None:
+        return description
 
-    descriptions = ORDER_STATUS_DESCRIPTIONS[status_lower]
-    return descriptions.get(language, descriptions["en"])
+    status_lower = status.lower()
+    return (
+        _FLAT_ORDER_STATUSES.get((status_lower, language))
+        or _FLAT_ORDER_STATUSES.get((status_lower, "en"))
+        or f"Order status: {status}"
+    )
 
 # Made with Bob
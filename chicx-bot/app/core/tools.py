@@ -12,7 +12,9 @@ the CHICX platform:
 Tools are defined in OpenAI function calling format.
 """
 
-from typing import Any
+from typing import Any, Literal, overload
+
+import orjson
 
 
 # Tool definitions in OpenAI function calling format
@@ -256,13 +258,45 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
 ]
 
 
-def get_tool_definitions() -> list[dict[str, Any]]:
+# Shared immutable view handed to every LLM request. The nested dicts stay
+# plain dicts: orjson (used by the LLM client) cannot encode MappingProxyType.
+_FROZEN_TOOLS: tuple[dict[str, Any], ...] = tuple(TOOL_DEFINITIONS)
+
+# The definitions never change at runtime, so encode the request payload once
+_TOOLS_JSON: bytes = orjson.dumps(_FROZEN_TOOLS)
+
+
+@overload
+def get_tool_definitions(copy: Literal[False] = False) -> tuple[dict[str, Any], ...]: ...
+
+
+@overload
+def get_tool_definitions(copy: Literal[True]) -> list[dict[str, Any]]: ...
+
+
+def get_tool_definitions(copy: bool = False) -> tuple[dict[str, Any], ...] | list[dict[str, Any]]:
     """Get all tool definitions for LLM function calling.
 
+    Args:
+        copy: Return a new list the caller may mutate. By default the shared,
+            read-only tuple is returned without allocating.
+
     Returns:
-        List of tool definitions in OpenAI function calling format.
+        Tool definitions in OpenAI function calling format.
     """
-    return TOOL_DEFINITIONS.copy()
+    if copy:
+        return list(TOOL_DEFINITIONS)
+    return _FROZEN_TOOLS
+
+
+def get_tool_definitions_json() -> bytes:
+    """Get the tool definitions pre-serialized as a JSON array.
+
+    Returns:
+        UTF-8 JSON bytes for get_tool_definitions(), for HTTP layers that
+        splice pre-encoded fragments into the request body.
+    """
+    return _TOOLS_JSON
 
 
 # Tool name constants for type-safe usage
@@ -288,6 +322,13 @@ TOOL_REQUIRED_PARAMS: dict[str, list[str]] = {
 }
 
 
+# Name indexes over TOOL_DEFINITIONS, built once at import
+_TOOL_BY_NAME: dict[str, dict[str, Any]] = {
+    tool["function"]["name"]: tool for tool in TOOL_DEFINITIONS
+}
+_TOOL_NAMES: tuple[str, ...] = tuple(_TOOL_BY_NAME)
+
+
 def get_tool_by_name(name: str) -> dict[str, Any] | None:
     """Get a tool definition by its name.
 
@@ -297,19 +338,16 @@ def get_tool_by_name(name: str) -> dict[str, Any] | None:
     Returns:
         The tool definition dict if found, None otherwise.
     """
-    for tool in TOOL_DEFINITIONS:
-        if tool.get("function", {}).get("name") == name:
-            return tool
-    return None
+    return _TOOL_BY_NAME.get(name)
 
 
-def get_tool_names() -> list[str]:
-    """Get a list of all available tool names.
+def get_tool_names() -> tuple[str, ...]:
+    """Get all available tool names.
 
     Returns:
-        List of tool name strings.
+        Tuple of tool name strings, in definition order.
     """
-    return [tool["function"]["name"] for tool in TOOL_DEFINITIONS]
+    return _TOOL_NAMES
 
 
 # Response schemas for tools (used for validation/documentation)
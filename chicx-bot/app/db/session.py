@@ -3,6 +3,7 @@
 from collections.abc import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import get_settings
 
@@ -11,10 +12,20 @@ settings = get_settings()
 engine = create_async_engine(
     settings.database_url,
     pool_size=settings.database_pool_size,
+    max_overflow=settings.database_max_overflow,
+    pool_recycle=settings.database_pool_recycle,
     pool_pre_ping=True,
     echo=settings.app_debug,
 )
 
+# The async engine must use the asyncio-aware queue pool; a sync QueuePool
+# here blocks the event loop when connections run out instead of awaiting
+if not isinstance(engine.pool, AsyncAdaptedQueuePool):
+    raise RuntimeError(
+        f"Unexpected database pool class: {type(engine.pool).__name__} "
+        "(expected AsyncAdaptedQueuePool)"
+    )
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
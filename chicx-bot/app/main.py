@@ -1,6 +1,6 @@
 """FastAPI application entry point."""
 
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from collections.abc import AsyncIterator
 
 import redis.asyncio as redis
@@ -18,6 +18,7 @@ from app.core.llm import shutdown_llm_client
 from app.services.embedding import shutdown_embedding_client
 from app.services.chicx_api import shutdown_chicx_client
 from app.services.bolna import shutdown_bolna_client
+from app.services.whatsapp import shutdown_whatsapp_client
 from app.api.admin import health, stats, recordings
 from app.api.webhooks import whatsapp, bolna, chicx
 
@@ -91,14 +92,17 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Check embeddings on startup
     await _check_embeddings()
 
-    yield
-    # Shutdown: Close connections
-    await shutdown_llm_client()
-    await shutdown_embedding_client()
-    await shutdown_chicx_client()
-    await shutdown_bolna_client()
-    if app.state.redis is not None:
-        await app.state.redis.close()
+    # Shutdown: Close connections. The exit stack runs every callback (LIFO)
+    # even if the server exits via an exception or an earlier callback fails.
+    async with AsyncExitStack() as shutdown:
+        if app.state.redis is not None:
+            shutdown.push_async_callback(app.state.redis.close)
+        shutdown.push_async_callback(shutdown_whatsapp_client)
+        shutdown.push_async_callback(shutdown_bolna_client)
+        shutdown.push_async_callback(shutdown_chicx_client)
+        shutdown.push_async_callback(shutdown_embedding_client)
+        shutdown.push_async_callback(shutdown_llm_client)
+        yield
 
 
 app = FastAPI(
@@ -35,6 +35,10 @@ class MessageType(str, Enum):
     UNKNOWN = "unknown"
 
 
+# Value lookups for the lenient webhook validators (no exception on unknown values)
+_MESSAGE_TYPES = {t.value: t for t in MessageType}
+
+
 class InteractiveType(str, Enum):
     """Types of interactive messages."""
     BUTTON_REPLY = "button_reply"
@@ -219,10 +223,7 @@ class Message(BaseModel):
     @classmethod
     def validate_type(cls, v: str) -> MessageType:
         """Convert unknown message types to UNKNOWN."""
-        try:
-            return MessageType(v)
-        except ValueError:
-            return MessageType.UNKNOWN
+        return _MESSAGE_TYPES.get(v, MessageType.UNKNOWN)
 
     @property
     def sender_phone(self) -> str:
@@ -271,6 +272,9 @@ class StatusType(str, Enum):
     FAILED = "failed"
 
 
+_STATUS_TYPES = {t.value: t for t in StatusType}
+
+
 class ConversationOrigin(BaseModel):
     """Origin of the conversation for billing."""
     type: str  # business_initiated, user_initiated, referral_conversion
@@ -304,10 +308,7 @@ class Status(BaseModel):
     @classmethod
     def validate_status(cls, v: str) -> StatusType:
         """Convert status string to enum."""
-        try:
-            return StatusType(v)
-        except ValueError:
-            return StatusType.FAILED
+        return _STATUS_TYPES.get(v, StatusType.FAILED)
 
 
 # ============================================================================
@@ -11,6 +11,7 @@ import logging
 from typing import Any
 
 import httpx
+import orjson
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from app.config import get_settings
@@ -125,7 +126,7 @@ class ChicxAPIClient:
         try:
             response = await client.get("/api/get_products.php", params=params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # API returns {"status": "success", "data": [...], "pagination": {...}}
             if data.get("status") != "success":
@@ -180,7 +181,7 @@ class ChicxAPIClient:
                 params={"search": product_id}
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # API returns {"status": "success", "data": [...]}
             if data.get("status") != "success":
@@ -243,7 +244,7 @@ class ChicxAPIClient:
                 return None
 
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # API returns {"status": "success", "data": {...}}
             if data.get("status") != "success":
@@ -298,7 +299,7 @@ class ChicxAPIClient:
                 return None
 
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # API returns {"status": "success", "data": {...}}
             if data.get("status") != "success":
@@ -352,7 +353,7 @@ class ChicxAPIClient:
         try:
             response = await client.get("/api/my_orders.php", params=params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # API returns {"status": "success", "data": [...]}
             if data.get("status") != "success":
@@ -422,7 +423,7 @@ class ChicxAPIClient:
                 params={"phone": phone}
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # API returns {"status": "success", "data": [...] or "data": {...}}
             if data.get("status") != "success":
@@ -498,7 +499,7 @@ class ChicxAPIClient:
                 json=payload,
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # API returns {"status": "success", "message": "..."}
             logger.info(f"Order confirmation sent successfully: {order_id}")
@@ -43,6 +43,55 @@ async def shutdown_embedding_client() -> None:
         _http_client = None
 
 
+@retry(
+    retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException, httpx.HTTPStatusError)),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    reraise=True,
+)
+async def generate_embedding(text_content: str) -> list[float]:
+    """Generate embedding vector for text using OpenRouter (NVIDIA Llama Nemotron - FREE).
+
+    Args:
+        text_content: Text to embed
+
+    Returns:
+        Embedding vector as list of floats (768 dimensions)
+    """
+    api_key = get_settings().openrouter_api_key
+    if not api_key:
+        raise ValueError("OPENROUTER_API_KEY not configured for embeddings")
+
+    # Use free NVIDIA embedding model from OpenRouter
+    model = "nvidia/llama-nemotron-embed-vl-1b-v2:free"
+    url = "https://openrouter.ai/api/v1/embeddings"
+
+    client = _get_http_client()
+
+    try:
+        response = await client.post(
+            url,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": model,
+                "input": text_content,
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        # OpenRouter returns embeddings in data[0].embedding format
+        return data["data"][0]["embedding"]
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Embedding API error {e.response.status_code}: {e.response.text}")
+        raise
+    except Exception as e:
+        logger.error(f"Error generating embedding: {e}")
+        raise
+
+
 class EmbeddingService:
     """Service for generating and searching vector embeddings.
 
@@ -58,53 +107,9 @@ class EmbeddingService:
         self._db = db
         self._settings = get_settings()
 
-    @retry(
-        retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException, httpx.HTTPStatusError)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        reraise=True,
-    )
     async def generate_embedding(self, text_content: str) -> list[float]:
-        """Generate embedding vector for text using OpenRouter (NVIDIA Llama Nemotron - FREE).
-
-        Args:
-            text_content: Text to embed
-
-        Returns:
-            Embedding vector as list of floats (768 dimensions)
-        """
-        api_key = self._settings.openrouter_api_key
-        if not api_key:
-            raise ValueError("OPENROUTER_API_KEY not configured for embeddings")
-
-        # Use free NVIDIA embedding model from OpenRouter
-        model = "nvidia/llama-nemotron-embed-vl-1b-v2:free"
-        url = "https://openrouter.ai/api/v1/embeddings"
-
-        client = _get_http_client()
-
-        try:
-            response = await client.post(
-                url,
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": model,
-                    "input": text_content,
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-            # OpenRouter returns embeddings in data[0].embedding format
-            return data["data"][0]["embedding"]
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Embedding API error {e.response.status_code}: {e.response.text}")
-            raise
-        except Exception as e:
-            logger.error(f"Error generating embedding: {e}")
-            raise
+        """Generate embedding vector for text (see module-level generate_embedding)."""
+        return await generate_embedding(text_content)
 
     async def search_faqs(
         self,
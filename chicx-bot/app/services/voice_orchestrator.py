@@ -19,6 +19,7 @@ Architecture:
                                     Bolna TTS → User hears
 """
 
+import asyncio
 import json
 import logging
 from typing import Any
@@ -29,7 +30,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.core.llm import get_llm_client, OpenRouterClient, LLMError, ToolExecutor
-from app.core.prompts import get_system_prompt
+from app.core.prompts import get_prompt_cache_key, get_system_message
 from app.core.tools import get_tool_definitions, validate_tool_arguments, ToolName
 from app.models.user import User
 from app.models.conversation import (
@@ -133,6 +134,7 @@ class VoiceOrchestrator:
                 tool_executor=tool_executor,
                 max_iterations=5,
                 temperature=0.7,
+                prompt_cache_key=get_prompt_cache_key("voice"),
             )
             
             # 4. Add assistant response to context
@@ -191,21 +193,11 @@ class VoiceOrchestrator:
             else:
                 # First message - initialize with system prompt
                 logger.info(f"Initializing new context: call_id={call_id}")
-                return [
-                    {
-                        "role": "system",
-                        "content": get_system_prompt("voice")
-                    }
-                ]
+                return [get_system_message("voice", self._llm.model)]
         except Exception as e:
             logger.error(f"Error loading context: {e}")
             # Return fresh context on error
-            return [
-                {
-                    "role": "system",
-                    "content": get_system_prompt("voice")
-                }
-            ]
+            return [get_system_message("voice", self._llm.model)]
 
     async def _save_context(self, call_id: str, messages: list[dict[str, str]]) -> None:
         """Save conversation context to Redis.
@@ -269,6 +261,9 @@ class VoiceToolExecutor(ToolExecutor):
             user_phone: Caller's phone number (for authorization)
         """
         self._db = db
+        # Tools may run concurrently; an AsyncSession must not be shared
+        # across concurrent awaits, so DB access is serialized
+        self._db_lock = asyncio.Lock()
         self._redis = redis_client
         self._user_phone = user_phone
         self._chicx_client = get_chicx_client()
@@ -305,7 +300,8 @@ class VoiceToolExecutor(ToolExecutor):
             elif tool_name == ToolName.GET_ORDER_HISTORY:
                 result = await self._get_order_history(arguments)
             elif tool_name == ToolName.SEARCH_FAQ:
-                result = await self._search_faq(arguments)
+                async with self._db_lock:
+                    result = await self._search_faq(arguments)
             elif tool_name == ToolName.TRACK_SHIPMENT:
                 result = await self._track_shipment(arguments)
             else:
@@ -318,13 +314,14 @@ class VoiceToolExecutor(ToolExecutor):
             success = False
 
         # Log analytics event for tool call
-        await log_tool_call(
-            db=self._db,
-            tool_name=tool_name,
-            arguments=arguments,
-            result_success=success and "error" not in (result or {}),
-            channel="voice",
-        )
+        async with self._db_lock:
+            await log_tool_call(
+                db=self._db,
+                tool_name=tool_name,
+                arguments=arguments,
+                result_success=success and "error" not in (result or {}),
+                channel="voice",
+            )
 
         return result or {"error": "No result"}
 
@@ -11,20 +11,21 @@ Reference: https://developers.facebook.com/docs/whatsapp/cloud-api/messages
 """
 
 import asyncio
-import hashlib
 import hmac
-import json
 import logging
 from typing import Any
 
 import httpx
+import orjson
 import redis.asyncio as redis
+from redis.exceptions import WatchError
 from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.core.llm import get_llm_client, OpenRouterClient, LLMError
-from app.core.prompts import get_system_prompt
+from app.core.prompts import build_messages, get_prompt_cache_key
 from app.core.tools import get_tool_definitions, validate_tool_arguments, ToolName
 from app.models.user import User
 from app.models.conversation import (
@@ -56,6 +57,59 @@ WHATSAPP_API_BASE_URL = f"https://graph.facebook.com/{WHATSAPP_API_VERSION}"
 CONVERSATION_TTL_SECONDS = 24 * 60 * 60  # 24 hours
 CONTEXT_MESSAGE_LIMIT = 20  # Max messages to include in LLM context
 MESSAGE_DEDUP_TTL_SECONDS = 5 * 60  # 5 minutes for deduplication
+CONTEXT_APPEND_ATTEMPTS = 5  # Optimistic-lock retries when appending to context
+
+# Module-level HTTP client so every WhatsAppService shares one connection pool.
+# HTTP/2 lets concurrent Graph API requests share a single TLS connection.
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_shared_http_client() -> httpx.AsyncClient:
+    """Get or create the module-level HTTP client for the Graph API."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            headers={
+                "Authorization": f"Bearer {get_settings().whatsapp_access_token}",
+                "Content-Type": "application/json",
+            },
+        )
+    return _http_client
+
+
+async def shutdown_whatsapp_client() -> None:
+    """Shutdown the HTTP client. Call during app shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def verify_whatsapp_signature(secret: bytes, body: bytes, header: str) -> bool:
+    """Check a Meta X-Hub-Signature-256 header against the request body.
+
+    Args:
+        secret: WhatsApp app secret as bytes
+        body: Raw request body bytes
+        header: X-Hub-Signature-256 header value ("sha256=<hex digest>")
+
+    Returns:
+        True if the header carries a valid HMAC-SHA256 of the body
+    """
+    if not header or not header.startswith("sha256="):
+        return False
+
+    # Compare raw digest bytes rather than hex strings
+    try:
+        expected_digest = bytes.fromhex(header.removeprefix("sha256="))
+    except ValueError:
+        return False
+
+    # One-shot HMAC runs entirely in OpenSSL
+    return hmac.compare_digest(hmac.digest(secret, body, "sha256"), expected_digest)
 
 
 class WhatsAppServiceError(Exception):
@@ -91,6 +145,9 @@ class ChicxToolExecutor:
             user_phone: Phone number of the user
         """
         self._db = db
+        # Tools may run concurrently; an AsyncSession must not be shared
+        # across concurrent awaits, so DB access is serialized
+        self._db_lock = asyncio.Lock()
         self._redis = redis_client
         self._user_phone = user_phone
         self._settings = get_settings()
@@ -127,7 +184,8 @@ class ChicxToolExecutor:
             elif tool_name == ToolName.GET_ORDER_HISTORY:
                 result = await self._get_order_history(arguments)
             elif tool_name == ToolName.SEARCH_FAQ:
-                result = await self._search_faq(arguments)
+                async with self._db_lock:
+                    result = await self._search_faq(arguments)
             elif tool_name == ToolName.TRACK_SHIPMENT:
                 result = await self._track_shipment(arguments)
             else:
@@ -140,13 +198,14 @@ class ChicxToolExecutor:
             success = False
 
         # Log analytics event for tool call
-        await log_tool_call(
-            db=self._db,
-            tool_name=tool_name,
-            arguments=arguments,
-            result_success=success and "error" not in (result or {}),
-            channel="whatsapp",
-        )
+        async with self._db_lock:
+            await log_tool_call(
+                db=self._db,
+                tool_name=tool_name,
+                arguments=arguments,
+                result_success=success and "error" not in (result or {}),
+                channel="whatsapp",
+            )
 
         return result or {"error": "No result"}
 
@@ -463,32 +522,24 @@ class WhatsAppService:
         self._db = db
         self._redis = redis_client
         self._settings = get_settings()
-        self._http_client: httpx.AsyncClient | None = None
 
     async def _get_http_client(self) -> httpx.AsyncClient:
-        """Get or create the HTTP client for API calls."""
-        access_token = self._settings.whatsapp_access_token
-        if self._http_client is None or self._http_client.is_closed:
-            self._http_client = httpx.AsyncClient(
-                timeout=30.0,
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json",
-                },
-            )
-        return self._http_client
+        """Get the shared HTTP client for API calls."""
+        return _get_shared_http_client()
 
     async def close(self) -> None:
-        """Close the HTTP client."""
-        if self._http_client and not self._http_client.is_closed:
-            await self._http_client.aclose()
+        """Release per-request resources.
+
+        The HTTP client is shared across requests and closed at app shutdown
+        by shutdown_whatsapp_client(), so there is nothing to release here.
+        """
 
     # ========================================================================
     # Signature Verification
     # ========================================================================
 
+    @staticmethod
     def verify_webhook_signature(
-        self,
         payload: bytes,
         signature: str,
     ) -> bool:
@@ -501,30 +552,17 @@ class WhatsAppService:
         Returns:
             True if signature is valid, False otherwise
         """
-        if not self._settings.whatsapp_app_secret:
+        settings = get_settings()
+
+        if not settings.whatsapp_app_secret:
             logger.warning("WHATSAPP_APP_SECRET not configured, skipping signature verification")
             return True
 
-        if not signature or not signature.startswith("sha256="):
-            logger.warning(f"Invalid signature format: {signature[:30] if signature else 'None'}...")
-            return False
-
-        expected_signature = signature[7:]  # Remove "sha256=" prefix
-
-        computed_signature = hmac.HMAC(
-            key=self._settings.whatsapp_app_secret.encode("utf-8"),
-            msg=payload,
-            digestmod=hashlib.sha256,
-        ).hexdigest()
-
-        is_valid = hmac.compare_digest(computed_signature, expected_signature)
-        
-        # Debug logging
-        logger.info(f"Signature verification: valid={is_valid}, payload_len={len(payload)}")
-        if not is_valid:
-            logger.warning(f"Expected sig: {expected_signature[:16]}...")
-            logger.warning(f"Computed sig: {computed_signature[:16]}...")
+        is_valid = verify_whatsapp_signature(
+            settings.whatsapp_app_secret_bytes, payload, signature
+        )
 
+        logger.info("Signature verification: valid=%s, payload_len=%s", is_valid, len(payload))
         if not is_valid:
             logger.warning("Webhook signature verification failed")
 
@@ -561,19 +599,25 @@ class WhatsAppService:
         # Normalize phone number
         normalized_phone = phone.lstrip("+")
 
-        # Try to find existing user
-        result = await self._db.execute(
-            select(User).where(User.phone == normalized_phone)
+        # Existing users are the common case: a plain SELECT, no row write
+        user = await self._db.scalar(select(User).where(User.phone == normalized_phone))
+        if user is not None:
+            return user
+
+        # New number: INSERT ... DO NOTHING is race-safe for concurrent first
+        # messages. RETURNING yields no row if another request inserted first,
+        # so fall back to reading that row.
+        stmt = (
+            pg_insert(User)
+            .values(phone=normalized_phone)
+            .on_conflict_do_nothing(index_elements=[User.phone])
+            .returning(User)
         )
-        user = result.scalar_one_or_none()
-
+        user = (await self._db.execute(stmt)).scalar_one_or_none()
         if user is None:
-            # Create new user
-            user = User(phone=normalized_phone)
-            self._db.add(user)
-            await self._db.flush()
-            logger.info(f"Created new user: phone={normalized_phone}, id={user.id}")
-
+            user = (
+                await self._db.execute(select(User).where(User.phone == normalized_phone))
+            ).scalar_one()
         return user
 
     # ========================================================================
@@ -640,19 +684,25 @@ class WhatsAppService:
         """Get Redis key for conversation context."""
         return f"wa:context:{user_phone}"
 
-    async def get_conversation_context(self, user_phone: str) -> list[dict[str, str]]:
-        """Get conversation context from Redis."""
-        key = self._get_context_key(user_phone)
-        context_json = await self._redis.get(key)
-
+    def _parse_context(
+        self,
+        user_phone: str,
+        context_json: bytes | str | None,
+    ) -> list[dict[str, str]]:
+        """Decode a stored context value, treating missing/corrupt data as empty."""
         if context_json:
             try:
-                return json.loads(context_json)
-            except json.JSONDecodeError:
+                return orjson.loads(context_json)
+            except orjson.JSONDecodeError:
                 logger.warning(f"Failed to parse context for {user_phone}")
 
         return []
 
+    async def get_conversation_context(self, user_phone: str) -> list[dict[str, str]]:
+        """Get conversation context from Redis."""
+        key = self._get_context_key(user_phone)
+        return self._parse_context(user_phone, await self._redis.get(key))
+
     async def update_conversation_context(
         self,
         user_phone: str,
@@ -664,9 +714,39 @@ class WhatsAppService:
         await self._redis.setex(
             key,
             CONVERSATION_TTL_SECONDS,
-            json.dumps(limited_messages),
+            orjson.dumps(limited_messages),
         )
 
+    async def append_to_context(
+        self,
+        user_phone: str,
+        new_messages: list[dict[str, str]],
+    ) -> None:
+        """Append turns to the stored context atomically.
+
+        The context is re-read under WATCH and written in MULTI, so turns
+        saved by a concurrent delivery for the same user (e.g. two messages
+        whose LLM calls overlap) are kept instead of overwritten.
+        """
+        key = self._get_context_key(user_phone)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for _ in range(CONTEXT_APPEND_ATTEMPTS):
+                try:
+                    await pipe.watch(key)
+                    context = self._parse_context(user_phone, await pipe.get(key))
+                    context.extend(new_messages)
+                    pipe.multi()  # type: ignore[no-untyped-call]
+                    pipe.setex(
+                        key,
+                        CONVERSATION_TTL_SECONDS,
+                        orjson.dumps(context[-CONTEXT_MESSAGE_LIMIT:]),
+                    )
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+        logger.warning(f"Gave up appending context for {user_phone} after concurrent writes")
+
     async def add_to_context(
         self,
         user_phone: str,
@@ -729,8 +809,8 @@ class WhatsAppService:
             wa_message_id=wa_message_id,
         )
 
-        # Mark message as read
-        await self.mark_as_read(wa_message_id)
+        # Mark message as read concurrently with the LLM call (it never raises)
+        read_receipt = asyncio.create_task(self.mark_as_read(wa_message_id))
 
         # Get LLM response
         try:
@@ -744,6 +824,8 @@ class WhatsAppService:
                 "I'm having trouble processing your message right now. "
                 "Please try again in a moment or contact support@chicx.in for help."
             )
+        finally:
+            await read_receipt
 
         # Save assistant message to database
         await self.save_message(
@@ -771,16 +853,12 @@ class WhatsAppService:
         # Get conversation context
         context = await self.get_conversation_context(user_phone)
 
-        # Build messages list with system prompt
-        messages: list[dict[str, Any]] = [
-            {"role": "system", "content": get_system_prompt("whatsapp")},
-        ]
-        messages.extend(context)
-        messages.append({"role": "user", "content": user_message})
-
         # Get LLM client
         llm_client: OpenRouterClient = get_llm_client()
 
+        # Static (cacheable) system prompt first, per-user context after it
+        messages = build_messages("whatsapp", llm_client.model, context, user_message)
+
         # Create tool executor
         tool_executor = ChicxToolExecutor(
             db=self._db,
@@ -798,15 +876,23 @@ class WhatsAppService:
                     tool_executor=tool_executor,
                     max_iterations=5,
                     temperature=0.7,
+                    copy_messages=False,  # messages is built fresh per request
+                    prompt_cache_key=get_prompt_cache_key("whatsapp"),
                 ),
                 timeout=30.0
             )
 
             response_text = result["content"] or "I apologize, I couldn't generate a response."
 
-            # Update context
-            await self.add_to_context(user_phone, "user", user_message)
-            await self.add_to_context(user_phone, "assistant", response_text)
+            # Append both turns atomically; the context read above may be
+            # stale if another message from this user was answered meanwhile
+            await self.append_to_context(
+                user_phone,
+                [
+                    {"role": "user", "content": user_message},
+                    {"role": "assistant", "content": response_text},
+                ],
+            )
 
             logger.info(
                 f"LLM response generated: iterations={result['iterations']}, "
@@ -818,7 +904,10 @@ class WhatsAppService:
         except asyncio.TimeoutError:
             logger.error(f"LLM request timed out after 30 seconds for user {user_phone}")
             # Update context with user message only
-            await self.add_to_context(user_phone, "user", user_message)
+            await self.append_to_context(
+                user_phone,
+                [{"role": "user", "content": user_message}],
+            )
             return "I apologize, but I'm taking longer than expected to process your request. Please try again in a moment."
         
         except LLMError as e:
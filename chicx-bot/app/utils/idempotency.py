@@ -0,0 +1,49 @@
+"""Idempotency helpers for webhook endpoints.
+
+CHICX and Bolna retry webhooks on timeouts and 5xx responses, so the same
+payload can arrive several times. These helpers claim a per-payload key in
+Redis so only the first delivery does the work.
+"""
+
+import logging
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_SECONDS = 600  # 10 minutes covers the senders' retry windows
+
+
+async def once(
+    redis_client: aioredis.Redis | None,
+    key: str,
+    ttl: int = IDEMPOTENCY_TTL_SECONDS,
+) -> bool:
+    """Claim an idempotency key.
+
+    Args:
+        redis_client: Redis client, or None when Redis is unavailable
+        key: Key identifying the payload being processed
+        ttl: Seconds before the key expires and the payload may run again
+
+    Returns:
+        True if this is the first delivery (or Redis is unavailable),
+        False if the key was already claimed.
+    """
+    if redis_client is None:
+        return True
+    try:
+        return bool(await redis_client.set(key, "1", nx=True, ex=ttl))
+    except Exception as e:
+        logger.warning("Idempotency check failed for %s: %s", key, e)
+        return True
+
+
+async def release(redis_client: aioredis.Redis | None, key: str) -> None:
+    """Release a claimed key so a retry of a failed delivery is processed."""
+    if redis_client is None:
+        return
+    try:
+        await redis_client.delete(key)
+    except Exception as e:
+        logger.warning("Failed to release idempotency key %s: %s", key, e)
@@ -2,6 +2,9 @@
 
 import re
 
+# Characters stripped from phone numbers (everything except digits and +)
+_NON_PHONE_CHARS = re.compile(r"[^\d+]")
+
 
 def normalize_phone(phone: str | None, for_db: bool = False) -> str:
     """Normalize phone number for comparison and storage.
@@ -39,7 +42,7 @@ def normalize_phone(phone: str | None, for_db: bool = False) -> str:
         return ""
 
     # Remove all non-digit characters except +
-    phone = re.sub(r"[^\d+]", "", phone)
+    phone = _NON_PHONE_CHARS.sub("", phone)
 
     # Remove any + that's not at the start
     if "+" in phone:
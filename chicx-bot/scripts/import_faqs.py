@@ -13,6 +13,8 @@ import sys
 from pathlib import Path
 from typing import Any
 
+from sqlalchemy import select
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -24,6 +26,9 @@ from app.services.embedding import EmbeddingService
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Max questions per IN (...) lookup when checking for existing FAQs
+EXISTING_LOOKUP_BATCH_SIZE = 500
+
 
 def extract_text_from_pdf(file_path: Path) -> str:
     """Extract text from PDF file."""
@@ -223,14 +228,19 @@ async def import_faqs(docs_dir: Path):
     # Import into database
     async with async_session_maker() as db:
         embedding_service = EmbeddingService(db)
+
+        # Look up existing questions in batches instead of one query per FAQ
+        questions = [faq_data["question"] for faq_data in all_faqs]
+        existing_questions: set[str] = set()
+        for start in range(0, len(questions), EXISTING_LOOKUP_BATCH_SIZE):
+            batch = questions[start:start + EXISTING_LOOKUP_BATCH_SIZE]
+            result = await db.execute(select(FAQ.question).where(FAQ.question.in_(batch)))
+            existing_questions.update(result.scalars())
         
         for i, faq_data in enumerate(all_faqs, 1):
             try:
                 # Check if FAQ already exists
-                existing = await db.execute(
-                    select(FAQ).where(FAQ.question == faq_data["question"])
-                )
-                if existing.scalar_one_or_none():
+                if faq_data["question"] in existing_questions:
                     logger.info(f"[{i}/{len(all_faqs)}] FAQ already exists, skipping: {faq_data['question'][:50]}...")
                     continue
                 
@@ -252,6 +262,7 @@ async def import_faqs(docs_dir: Path):
                     logger.warning(f"Failed to create embedding for FAQ {faq.id}")
                 
                 await db.commit()
+                existing_questions.add(faq_data["question"])
                 
                 logger.info(f"[{i}/{len(all_faqs)}] ✓ Imported: {faq_data['question'][:50]}...")
             
@@ -277,7 +288,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    # Add missing import at top
-    from sqlalchemy import select
-    
     asyncio.run(main())
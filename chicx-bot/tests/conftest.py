@@ -180,6 +180,35 @@ def mock_redis() -> MagicMock:
     return redis_mock
 
 
+class FakeRedis:
+    """In-memory stand-in for the SET NX / DELETE calls used by idempotency."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, str | bytes | int] = {}
+
+    async def set(self, key: str, value: str, nx: bool = False, ex: int | None = None) -> bool:
+        if nx and key in self.store:
+            return False
+        self.store[key] = value
+        return True
+
+    async def setex(self, key: str, ttl: int, value: str | bytes | int) -> bool:
+        self.store[key] = value
+        return True
+
+    async def get(self, key: str) -> str | bytes | int | None:
+        return self.store.get(key)
+
+    async def delete(self, key: str) -> int:
+        return 1 if self.store.pop(key, None) is not None else 0
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    """Stateful in-memory Redis for idempotency tests."""
+    return FakeRedis()
+
+
 # ============================================================================
 # HTTP Client Fixtures
 # ============================================================================
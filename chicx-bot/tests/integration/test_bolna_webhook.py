@@ -0,0 +1,93 @@
+"""Integration tests for Bolna webhook endpoints."""
+
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import verify_bolna_webhook
+from app.db.session import get_db
+from app.main import app
+
+
+async def _no_db():
+    yield None
+
+
+@pytest.fixture
+def bolna_client(fake_redis):
+    """Test client with auth and DB dependencies overridden."""
+    app.state.redis = fake_redis
+    app.dependency_overrides[verify_bolna_webhook] = lambda: True
+    app.dependency_overrides[get_db] = _no_db
+    client = TestClient(app, raise_server_exceptions=False)
+    client.redis = fake_redis
+    yield client
+    app.dependency_overrides.clear()
+    delattr(app.state, "redis")
+
+
+TRANSCRIPT_PAYLOAD = {"call_id": "bolna-call-1", "transcript": "Hello, where is my order?"}
+
+
+@pytest.mark.integration
+@pytest.mark.voice
+class TestBolnaTranscript:
+    """Test the transcript webhook."""
+
+    @patch("app.api.webhooks.bolna.find_call", new_callable=AsyncMock)
+    def test_retry_after_failure_processed(self, mock_find_call, bolna_client: TestClient):
+        """Test that a failed delivery releases its claim so the retry is processed."""
+        mock_find_call.side_effect = [RuntimeError("database unavailable"), None]
+
+        first = bolna_client.post("/webhooks/bolna/transcript", json=TRANSCRIPT_PAYLOAD)
+        retry = bolna_client.post("/webhooks/bolna/transcript", json=TRANSCRIPT_PAYLOAD)
+
+        assert first.status_code == 500
+        assert retry.status_code == 200
+        assert retry.json()["reason"] != "duplicate"
+        assert mock_find_call.await_count == 2
+
+    @patch("app.api.webhooks.bolna.find_call", new_callable=AsyncMock)
+    def test_stale_segment_count_overwrites(self, mock_find_call, bolna_client: TestClient):
+        """Test that a stale stored count falls back to a full overwrite."""
+        mock_find_call.return_value = SimpleNamespace(id=uuid.uuid4(), language="en")
+        db = MagicMock()
+        db.scalar = AsyncMock(return_value=uuid.uuid4())
+        db.execute = AsyncMock(return_value=SimpleNamespace(rowcount=0))
+        db.commit = AsyncMock()
+
+        async def _db():
+            yield db
+
+        app.dependency_overrides[get_db] = _db
+        bolna_client.redis.store["call_segments_len:bolna-call-1"] = "1"
+        segment = {"speaker": "user", "text": "hi", "start_time": 0.0, "end_time": 1.0}
+        payload = {**TRANSCRIPT_PAYLOAD, "segments": [segment, segment]}
+
+        response = bolna_client.post("/webhooks/bolna/transcript", json=payload)
+
+        assert response.status_code == 200
+        append_stmt, append_params = db.execute.await_args_list[0].args
+        assert "jsonb_array_length" in str(append_stmt)
+        assert append_params["stored_len"] == 1
+        overwrite_stmt = db.execute.await_args_list[1].args[0]
+        assert str(overwrite_stmt).startswith("UPDATE call_transcripts")
+        assert overwrite_stmt.compile().params["segments"] == [segment, segment]
+
+    @patch("app.api.webhooks.bolna._store_transcript", new_callable=AsyncMock)
+    def test_same_length_transcript_processed(self, mock_store, bolna_client: TestClient):
+        """Test that a different transcript of the same length is not deduplicated."""
+        mock_store.return_value = {"status": "ok"}
+        updated = {**TRANSCRIPT_PAYLOAD, "transcript": "Hello, where is my parcel"}
+        assert len(updated["transcript"]) == len(TRANSCRIPT_PAYLOAD["transcript"])
+
+        bolna_client.post("/webhooks/bolna/transcript", json=TRANSCRIPT_PAYLOAD)
+        second = bolna_client.post("/webhooks/bolna/transcript", json=updated)
+        replay = bolna_client.post("/webhooks/bolna/transcript", json=updated)
+
+        assert second.json() == {"status": "ok"}
+        assert replay.json()["reason"] == "duplicate"
+        assert mock_store.await_count == 2
@@ -0,0 +1,172 @@
+"""Integration tests for CHICX webhook endpoints."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.webhooks.chicx import verify_chicx_webhook
+from app.db.session import get_db
+from app.main import app
+
+
+async def _no_db():
+    yield None
+
+
+@pytest.fixture
+def chicx_client(fake_redis):
+    """Test client with auth and DB dependencies overridden."""
+    app.state.redis = fake_redis
+    app.dependency_overrides[verify_chicx_webhook] = lambda: True
+    app.dependency_overrides[get_db] = _no_db
+    client = TestClient(app)
+    client.redis = fake_redis
+    yield client
+    app.dependency_overrides.clear()
+    delattr(app.state, "redis")
+
+
+OTP_PAYLOAD = {"phone": "9876543210", "otp": "123456"}
+IDEMPOTENCY_HEADERS = {"X-CHICX-Idempotency-Key": "otp-1"}
+
+
+@pytest.mark.integration
+class TestChicxIdempotency:
+    """Test X-CHICX-Idempotency-Key handling."""
+
+    @patch("app.services.whatsapp.WhatsAppService.send_template_message", new_callable=AsyncMock)
+    def test_first_request_processed(self, mock_send, chicx_client: TestClient):
+        """Test that the first delivery is processed and claims the key."""
+        mock_send.return_value = {"messages": [{"id": "wamid.1"}]}
+
+        response = chicx_client.post(
+            "/webhooks/chicx/send-otp", json=OTP_PAYLOAD, headers=IDEMPOTENCY_HEADERS
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+        assert "idem:chicx:otp-1" in chicx_client.redis.store
+
+    @patch("app.services.whatsapp.WhatsAppService.send_template_message", new_callable=AsyncMock)
+    def test_duplicate_replays_response(self, mock_send, chicx_client: TestClient):
+        """Test that a replay of a successful request returns the stored response."""
+        mock_send.return_value = {"messages": [{"id": "wamid.1"}]}
+
+        first = chicx_client.post(
+            "/webhooks/chicx/send-otp", json=OTP_PAYLOAD, headers=IDEMPOTENCY_HEADERS
+        )
+        replay = chicx_client.post(
+            "/webhooks/chicx/send-otp", json=OTP_PAYLOAD, headers=IDEMPOTENCY_HEADERS
+        )
+
+        assert replay.status_code == 200
+        assert replay.json() == {**first.json(), "dedup": True}
+        assert mock_send.await_count == 1
+
+    @patch("app.services.whatsapp.WhatsAppService.send_template_message", new_callable=AsyncMock)
+    def test_duplicate_in_flight_acknowledged(self, mock_send, chicx_client: TestClient):
+        """Test that a replay with no stored response gets the plain dedup body."""
+        chicx_client.redis.store["idem:chicx:otp-1"] = "1"
+
+        response = chicx_client.post(
+            "/webhooks/chicx/send-otp", json=OTP_PAYLOAD, headers=IDEMPOTENCY_HEADERS
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok", "dedup": True}
+        mock_send.assert_not_awaited()
+
+    @patch("app.services.whatsapp.WhatsAppService.send_template_message", new_callable=AsyncMock)
+    def test_retry_after_failure_processed(self, mock_send, chicx_client: TestClient):
+        """Test that an error result releases the key so the retry is sent."""
+        mock_send.side_effect = [RuntimeError("Graph API down"), {"messages": [{"id": "wamid.2"}]}]
+
+        first = chicx_client.post(
+            "/webhooks/chicx/send-otp", json=OTP_PAYLOAD, headers=IDEMPOTENCY_HEADERS
+        )
+        retry = chicx_client.post(
+            "/webhooks/chicx/send-otp", json=OTP_PAYLOAD, headers=IDEMPOTENCY_HEADERS
+        )
+
+        assert first.json()["status"] == "error"
+        assert retry.status_code == 200
+        assert retry.json()["status"] == "ok"
+        assert mock_send.await_count == 2
+
+    @patch("app.services.whatsapp.WhatsAppService.send_template_message", new_callable=AsyncMock)
+    def test_order_update_retry_after_failure_processed(self, mock_send, chicx_client: TestClient):
+        """Test that order-update releases both its payload key and the header key."""
+        mock_send.side_effect = [RuntimeError("Graph API down"), {"messages": [{"id": "wamid.3"}]}]
+        payload = {"phone": "9876543210", "order_id": "ORD1", "order_status": "shipped"}
+        headers = {"X-CHICX-Idempotency-Key": "order-1"}
+
+        first = chicx_client.post("/webhooks/chicx/order-update", json=payload, headers=headers)
+        retry = chicx_client.post("/webhooks/chicx/order-update", json=payload, headers=headers)
+
+        assert first.json()["status"] == "error"
+        assert retry.status_code == 200
+        assert retry.json()["status"] == "ok"
+
+
+CONFIRM_PAYLOAD = {"phone": "9876543210", "order_id": "ORD9", "total_amount": 2499.0, "cod": True}
+CONFIRM_HEADERS = {"X-CHICX-Idempotency-Key": "confirm-1"}
+
+
+@pytest.mark.integration
+@pytest.mark.voice
+class TestChicxConfirmOrder:
+    """Test the order confirmation call and its status endpoint."""
+
+    @pytest.fixture(autouse=True)
+    def bolna_settings(self):
+        with patch.multiple(
+            "app.api.webhooks.chicx.settings",
+            bolna_api_key="test-key",
+            bolna_confirmation_agent_id="agent-1",
+        ):
+            yield
+
+    @patch("app.services.bolna.get_bolna_client")
+    def test_call_id_exposed_for_polling(self, mock_get_client, chicx_client: TestClient):
+        """Test that the background call's call_id can be polled."""
+        mock_get_client.return_value.make_outbound_call = AsyncMock(
+            return_value={"call_id": "call-1"}
+        )
+
+        queued = chicx_client.post(
+            "/webhooks/chicx/confirm-order", json=CONFIRM_PAYLOAD, headers=CONFIRM_HEADERS
+        )
+        status = chicx_client.get("/webhooks/chicx/confirm-order/ORD9")
+
+        assert queued.json()["status"] == "queued"
+        assert status.status_code == 200
+        assert status.json() == {"order_id": "ORD9", "status": "initiated", "call_id": "call-1"}
+        assert chicx_client.redis.store["confirmation_call:call-1"] == "ORD9"
+
+    @patch("app.services.bolna.get_bolna_client")
+    def test_failed_call_released_for_retry(self, mock_get_client, chicx_client: TestClient):
+        """Test that a Bolna failure is reported and the retry places the call."""
+        mock_get_client.return_value.make_outbound_call = AsyncMock(
+            side_effect=[RuntimeError("Bolna down"), {"call_id": "call-2"}]
+        )
+
+        chicx_client.post(
+            "/webhooks/chicx/confirm-order", json=CONFIRM_PAYLOAD, headers=CONFIRM_HEADERS
+        )
+        failed = chicx_client.get("/webhooks/chicx/confirm-order/ORD9").json()
+        pending_after_failure = "pending_confirmation:ORD9" in chicx_client.redis.store
+        retry = chicx_client.post(
+            "/webhooks/chicx/confirm-order", json=CONFIRM_PAYLOAD, headers=CONFIRM_HEADERS
+        )
+
+        assert failed["status"] == "failed"
+        assert not pending_after_failure
+        assert "dedup" not in retry.json()
+        assert chicx_client.get("/webhooks/chicx/confirm-order/ORD9").json()["call_id"] == "call-2"
+
+    def test_unknown_order_not_found(self, chicx_client: TestClient):
+        """Test that polling an order with no confirmation call returns 404."""
+        response = chicx_client.get("/webhooks/chicx/confirm-order/UNKNOWN")
+
+        assert response.status_code == 404
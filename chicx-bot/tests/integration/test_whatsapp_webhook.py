@@ -4,6 +4,8 @@ import pytest
 from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 
+from app.api.webhooks.whatsapp import MAX_WEBHOOK_BYTES
+
 
 @pytest.mark.integration
 @pytest.mark.whatsapp
@@ -120,6 +122,50 @@ class TestWhatsAppWebhookMessages:
         # Signature verification fails first (403), before payload validation (400)
         assert response.status_code == 403
 
+    @patch("app.services.whatsapp.WhatsAppService.verify_webhook_signature")
+    def test_receive_message_oversized_body(
+        self,
+        mock_verify,
+        test_client: TestClient,
+    ):
+        """Test oversized bodies are rejected before signature verification."""
+        response = test_client.post(
+            "/webhooks/whatsapp",
+            content=b"x" * (MAX_WEBHOOK_BYTES + 1),
+            headers={"X-Hub-Signature-256": "sha256=test_signature"},
+        )
+
+        assert response.status_code == 413
+        mock_verify.assert_not_called()
+
+    @patch("app.services.whatsapp.WhatsAppService.verify_webhook_signature")
+    def test_receive_message_oversized_chunked_body(
+        self,
+        mock_verify,
+        test_client: TestClient,
+    ):
+        """Test chunked bodies without Content-Length are capped while streaming."""
+        chunks = (b"x" * (1024 * 1024) for _ in range(4))
+        response = test_client.post(
+            "/webhooks/whatsapp",
+            content=chunks,
+            headers={"X-Hub-Signature-256": "sha256=test_signature"},
+        )
+
+        assert response.status_code == 413
+        mock_verify.assert_not_called()
+
+    def test_receive_message_invalid_content_length(self, test_client: TestClient):
+        """Test a malformed Content-Length header is rejected with 400."""
+        response = test_client.post(
+            "/webhooks/whatsapp",
+            content=b"{}",
+            headers={"Content-Length": "abc", "X-Hub-Signature-256": "sha256=test_signature"},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid Content-Length"
+
     def test_webhook_health_check(self, test_client: TestClient):
         """Test webhook health check endpoint."""
         response = test_client.get("/webhooks/whatsapp/health")
@@ -23,7 +23,8 @@ class TestSettings:
         assert settings.app_env == "testing"
         assert settings.app_debug is False
         assert settings.app_port == 8000
-        assert settings.database_pool_size == 5
+        assert settings.database_pool_size == 20
+        assert settings.database_max_overflow == 20
 
     def test_settings_is_development(self):
         """Test is_development property."""
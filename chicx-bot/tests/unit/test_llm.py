@@ -0,0 +1,324 @@
+"""Unit tests for the LLM client helpers."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+import orjson
+import pytest
+
+from app.core.llm import (
+    MAX_RETRY_WAIT_SECONDS,
+    LLMConnectionError,
+    LLMRateLimitError,
+    LLMResponseError,
+    OpenRouterClient,
+    ToolExecutor,
+    _parse_retry_after,
+    _wait_retry_after_or_exponential,
+)
+from app.core.llm_cache import LLMCache
+
+
+class _FakeOutcome:
+    def __init__(self, exc: BaseException) -> None:
+        self._exc = exc
+
+    def exception(self) -> BaseException:
+        return self._exc
+
+
+class _FakeRetryState:
+    def __init__(self, exc: BaseException, attempt_number: int = 1) -> None:
+        self.outcome = _FakeOutcome(exc)
+        self.attempt_number = attempt_number
+
+
+@pytest.mark.unit
+class TestRetryAfter:
+    """Test Retry-After handling for rate-limited requests."""
+
+    def test_parse_delta_seconds(self):
+        """Test Retry-After given in seconds."""
+        assert _parse_retry_after(httpx.Headers({"Retry-After": "7"})) == 7.0
+
+    def test_parse_ratelimit_reset_ms(self):
+        """Test fallback to X-RateLimit-Reset in epoch milliseconds."""
+        reset_ms = str(int((time.time() + 5) * 1000))
+        wait = _parse_retry_after(httpx.Headers({"X-RateLimit-Reset": reset_ms}))
+        assert 3.0 < wait <= 5.0
+
+    def test_parse_missing_or_invalid(self):
+        """Test that absent or unparseable headers yield None."""
+        assert _parse_retry_after(httpx.Headers({})) is None
+        assert _parse_retry_after(httpx.Headers({"Retry-After": "soon"})) is None
+
+    def test_wait_prefers_retry_after(self):
+        """Test that the server's Retry-After wins over exponential backoff."""
+        state = _FakeRetryState(LLMRateLimitError("429", retry_after=4.0))
+        assert _wait_retry_after_or_exponential(state) == 4.0
+
+    def test_wait_caps_retry_after(self):
+        """Test that very long Retry-After values are capped."""
+        state = _FakeRetryState(LLMRateLimitError("429", retry_after=3600.0))
+        assert _wait_retry_after_or_exponential(state) == MAX_RETRY_WAIT_SECONDS
+
+    def test_wait_falls_back_to_exponential(self):
+        """Test exponential backoff when no Retry-After was given."""
+        state = _FakeRetryState(httpx.ConnectError("boom"))
+        assert _wait_retry_after_or_exponential(state) == 2
+
+
+class _SlowExecutor(ToolExecutor):
+    """Executor whose tools sleep, to detect concurrent execution."""
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+
+    async def execute(self, tool_name, arguments):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if tool_name == "broken":
+            raise RuntimeError("boom")
+        return {"tool": tool_name}
+
+
+def _tool_call(call_id: str, name: str) -> dict:
+    return {"id": call_id, "function": {"name": name, "arguments": "{}"}}
+
+
+@pytest.mark.unit
+class TestChatWithTools:
+    """Test the tool calling loop."""
+
+    async def test_tool_calls_run_concurrently_in_order(self):
+        """Test that sibling tool calls overlap and results keep their order."""
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._settings = SimpleNamespace(max_parallel_tools=4)
+        usage = {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        client.chat_completion = AsyncMock(side_effect=[
+            {
+                "content": None,
+                "tool_calls": [
+                    _tool_call("a", "search_faq"),
+                    _tool_call("b", "broken"),
+                    _tool_call("c", "search_products"),
+                ],
+                "usage": usage,
+            },
+            {"content": "done", "tool_calls": None, "usage": usage},
+        ])
+        executor = _SlowExecutor()
+
+        result = await client.chat_with_tools(
+            messages=[{"role": "user", "content": "hi"}],
+            tools=[],
+            tool_executor=executor,
+        )
+
+        assert result["content"] == "done"
+        assert executor.max_running == 3
+        assert [call["name"] for call in result["tool_calls_made"]] == [
+            "search_faq", "broken", "search_products",
+        ]
+        assert "error" in result["tool_calls_made"][1]["result"]
+
+        conversation = client.chat_completion.call_args_list[1].kwargs["messages"]
+        assert [m.get("tool_call_id") for m in conversation[-3:]] == ["a", "b", "c"]
+
+    async def test_final_iteration_tool_calls_not_executed(self):
+        """Test that tool calls on the tool-less final call are skipped."""
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._settings = SimpleNamespace(max_parallel_tools=4)
+        usage = {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        client.chat_completion = AsyncMock(return_value={
+            "content": None,
+            "tool_calls": [_tool_call("a", "search_faq")],
+            "usage": usage,
+        })
+        executor = _SlowExecutor()
+        executor.execute = AsyncMock(wraps=executor.execute)
+
+        result = await client.chat_with_tools(
+            messages=[{"role": "user", "content": "hi"}],
+            tools=[],
+            tool_executor=executor,
+            max_iterations=2,
+        )
+
+        assert client.chat_completion.await_count == 2
+        assert executor.execute.await_count == 1
+        assert result["iterations"] == 2
+        assert result["content"]
+
+    async def test_tool_concurrency_is_bounded(self):
+        """Test that at most max_parallel_tools tools run at once."""
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._settings = SimpleNamespace(max_parallel_tools=2)
+        usage = {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        client.chat_completion = AsyncMock(side_effect=[
+            {
+                "content": None,
+                "tool_calls": [_tool_call(str(i), "search_faq") for i in range(5)],
+                "usage": usage,
+            },
+            {"content": "done", "tool_calls": None, "usage": usage},
+        ])
+        executor = _SlowExecutor()
+
+        result = await client.chat_with_tools(
+            messages=[{"role": "user", "content": "hi"}],
+            tools=[],
+            tool_executor=executor,
+        )
+
+        assert executor.max_running == 2
+        assert len(result["tool_calls_made"]) == 5
+
+
+@pytest.mark.unit
+class TestToolSchemaEncoding:
+    """Test pre-encoding of tool definitions."""
+
+    def test_shallow_copies_share_encoding(self):
+        """Test that copies of the same definitions reuse the cached bytes."""
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._tools_json = {}
+        definitions = [{"type": "function", "function": {"name": "search_faq"}}]
+
+        first = client._encode_tools(list(definitions))
+        second = client._encode_tools(list(definitions))
+
+        assert first is second
+        assert orjson.loads(first) == definitions
+        assert len(client._tools_json) == 1
+
+
+@pytest.mark.unit
+class TestPromptCacheKey:
+    """Test prompt_cache_key routing hints."""
+
+    @staticmethod
+    def _client(model: str, sent: list[dict]) -> OpenRouterClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(orjson.loads(request.content))
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": "hi"}, "finish_reason": "stop"}],
+            })
+
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._model = model
+        client._cache = LLMCache()
+        client._semantic_cache = None
+        client._client = httpx.AsyncClient(
+            base_url="https://openrouter.test", transport=httpx.MockTransport(handler)
+        )
+        return client
+
+    async def test_sent_to_openai_models(self):
+        """Test that OpenAI models receive the prompt_cache_key."""
+        sent: list[dict] = []
+        client = self._client("openai/gpt-4o-mini", sent)
+
+        await client.chat_completion(
+            [{"role": "user", "content": "hi"}], prompt_cache_key="chicx-whatsapp-abc"
+        )
+
+        assert sent[0]["prompt_cache_key"] == "chicx-whatsapp-abc"
+
+    async def test_omitted_for_other_models(self):
+        """Test that other providers never see the OpenAI-only field."""
+        sent: list[dict] = []
+        client = self._client("google/gemini-2.0-flash-001", sent)
+
+        await client.chat_completion(
+            [{"role": "user", "content": "hi"}], prompt_cache_key="chicx-whatsapp-abc"
+        )
+
+        assert "prompt_cache_key" not in sent[0]
+
+
+@pytest.mark.unit
+class TestChatCompletionStream:
+    """Test streaming chat completions."""
+
+    async def test_yields_content_deltas(self):
+        """Test that SSE deltas are yielded in order until [DONE]."""
+        sse = (
+            b": OPENROUTER PROCESSING\n\n"
+            b'data: {"choices":[{"delta":{"role":"assistant","content":"Hel"}}]}\n\n'
+            b'data: {"choices":[{"delta":{"content":"lo"}}]}\n\n'
+            b'data: {"choices":[{"delta":{},"finish_reason":"stop"}]}\n\n'
+            b"data: [DONE]\n\n"
+        )
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._model = "test-model"
+        client._client = httpx.AsyncClient(
+            base_url="https://openrouter.test",
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=sse)),
+        )
+
+        chunks = [
+            chunk async for chunk in client.chat_completion_stream(
+                [{"role": "user", "content": "hi"}]
+            )
+        ]
+
+        assert chunks == ["Hel", "lo"]
+
+    async def test_rate_limit_raises(self):
+        """Test that a 429 surfaces as LLMRateLimitError with retry_after."""
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._model = "test-model"
+        client._client = httpx.AsyncClient(
+            base_url="https://openrouter.test",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(429, headers={"Retry-After": "3"})
+            ),
+        )
+
+        with pytest.raises(LLMRateLimitError) as exc_info:
+            async for _ in client.chat_completion_stream([{"role": "user", "content": "hi"}]):
+                pass
+
+        assert exc_info.value.retry_after == 3.0
+
+    async def test_malformed_chunk_raises_response_error(self):
+        """Test that an unparseable data line surfaces as LLMResponseError."""
+        sse = b'data: {"choices":[{"delta":{"content":"Hel"}}]}\n\ndata: {"choices":\n\n'
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._model = "test-model"
+        client._client = httpx.AsyncClient(
+            base_url="https://openrouter.test",
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=sse)),
+        )
+
+        chunks = []
+        with pytest.raises(LLMResponseError):
+            async for chunk in client.chat_completion_stream([{"role": "user", "content": "hi"}]):
+                chunks.append(chunk)
+
+        assert chunks == ["Hel"]
+
+    async def test_dropped_stream_raises_connection_error(self):
+        """Test that a mid-stream read failure surfaces as LLMConnectionError."""
+
+        async def _body():
+            yield b'data: {"choices":[{"delta":{"content":"Hel"}}]}\n\n'
+            raise httpx.ReadError("connection reset")
+
+        client = OpenRouterClient.__new__(OpenRouterClient)
+        client._model = "test-model"
+        client._client = httpx.AsyncClient(
+            base_url="https://openrouter.test",
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=_body())),
+        )
+
+        with pytest.raises(LLMConnectionError):
+            async for _ in client.chat_completion_stream([{"role": "user", "content": "hi"}]):
+                pass
@@ -0,0 +1,113 @@
+"""Unit tests for the LLM response caches."""
+
+import pytest
+
+from app.core.llm_cache import LLMCache, SemanticLLMCache
+
+MESSAGES = [{"role": "user", "content": "Where is my order?"}]
+
+
+@pytest.mark.unit
+class TestLLMCache:
+    """Test LLMCache class."""
+
+    def test_cache_key_only_for_zero_temperature(self):
+        """Test that only deterministic requests get a cache key."""
+        assert LLMCache.cache_key("model", MESSAGES, 0.0) is not None
+        assert LLMCache.cache_key("model", MESSAGES, 0.7) is None
+
+    def test_cache_key_is_canonical(self):
+        """Test that dict key order does not change the key."""
+        reordered = [{"content": "Where is my order?", "role": "user"}]
+        assert LLMCache.cache_key("model", MESSAGES, 0) == LLMCache.cache_key(
+            "model", reordered, 0
+        )
+        assert LLMCache.cache_key("model", MESSAGES, 0) != LLMCache.cache_key(
+            "other-model", MESSAGES, 0
+        )
+
+    def test_get_returns_copy(self):
+        """Test that callers cannot mutate cached results."""
+        cache = LLMCache()
+        cache.set("k", {"content": "hi", "tool_calls": None})
+
+        hit = cache.get("k")
+        hit["content"] = "changed"
+
+        assert cache.get("k")["content"] == "hi"
+        assert cache.get("missing") is None
+        assert cache.stats == {"hits": 2, "misses": 1}
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest entry is evicted at capacity."""
+        cache = LLMCache(maxsize=2)
+        cache.set("a", {"content": "a"})
+        cache.set("b", {"content": "b"})
+        cache.get("a")
+        cache.set("c", {"content": "c"})
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+    def test_expired_entries_miss(self):
+        """Test that entries past their TTL are not returned."""
+        cache = LLMCache(ttl=-1)
+        cache.set("k", {"content": "stale"})
+
+        assert cache.get("k") is None
+        assert len(cache) == 0
+
+
+@pytest.mark.unit
+class TestSemanticLLMCache:
+    """Test SemanticLLMCache class."""
+
+    SCOPE = SemanticLLMCache.scope_key("model", MESSAGES)
+
+    def test_similar_embedding_hits(self):
+        """Test that a near-identical embedding returns the cached result."""
+        cache = SemanticLLMCache(threshold=0.9)
+        cache.set(self.SCOPE, [1.0, 0.0, 0.0], {"content": "Paris"})
+
+        assert cache.get(self.SCOPE, [0.99, 0.05, 0.0])["content"] == "Paris"
+
+    def test_dissimilar_embedding_misses(self):
+        """Test that an unrelated embedding is a miss."""
+        cache = SemanticLLMCache(threshold=0.9)
+        cache.set(self.SCOPE, [1.0, 0.0, 0.0], {"content": "Paris"})
+
+        assert cache.get(self.SCOPE, [0.0, 1.0, 0.0]) is None
+        assert cache.stats == {"hits": 0, "misses": 1}
+
+    def test_other_scope_misses(self):
+        """Test that an identical query under another prefix is a miss."""
+        cache = SemanticLLMCache(threshold=0.9)
+        cache.set(self.SCOPE, [1.0, 0.0, 0.0], {"content": "Paris"})
+
+        other = SemanticLLMCache.scope_key("other-model", MESSAGES)
+        assert cache.get(other, [1.0, 0.0, 0.0]) is None
+
+    def test_scope_key_ignores_only_last_message(self):
+        """Test that the scope covers history but not the query itself."""
+        system = {"role": "system", "content": "You are CHICX Assistant"}
+        first = [system, {"role": "user", "content": "Where is my order?"}]
+        paraphrase = [system, {"role": "user", "content": "Order status pls"}]
+        other_history = [
+            {"role": "system", "content": "Another prompt"},
+            {"role": "user", "content": "Where is my order?"},
+        ]
+
+        scope = SemanticLLMCache.scope_key("model", first, 256)
+        assert scope == SemanticLLMCache.scope_key("model", paraphrase, 256)
+        assert scope != SemanticLLMCache.scope_key("model", other_history, 256)
+        assert scope != SemanticLLMCache.scope_key("model", first, 512)
+
+    def test_evicts_oldest_at_capacity(self):
+        """Test that the oldest entry is dropped once maxsize is reached."""
+        cache = SemanticLLMCache(threshold=0.9, maxsize=1)
+        cache.set(self.SCOPE, [1.0, 0.0], {"content": "first"})
+        cache.set(self.SCOPE, [0.0, 1.0], {"content": "second"})
+
+        assert len(cache) == 1
+        assert cache.get(self.SCOPE, [1.0, 0.0]) is None
@@ -3,8 +3,12 @@
 import pytest
 from app.core.prompts import (
     get_system_prompt,
+    get_system_message,
+    build_messages,
+    get_prompt_cache_key,
     get_error_response,
     get_order_status_description,
+    ERROR_RESPONSES,
     WHATSAPP_SYSTEM_PROMPT,
 )
 
@@ -31,6 +35,48 @@ class TestSystemPrompts:
         prompt = get_system_prompt()
         assert prompt == WHATSAPP_SYSTEM_PROMPT
 
+    def test_get_system_message_cache_control(self):
+        """Test that Anthropic/Gemini models get a cacheable system block."""
+        message = get_system_message("whatsapp", "google/gemini-2.0-flash-001")
+        assert message["role"] == "system"
+        blocks = message["content"]
+        assert len(blocks) == 3
+        assert "\n\n".join(block["text"] for block in blocks) == WHATSAPP_SYSTEM_PROMPT
+        assert all(block["cache_control"] == {"type": "ephemeral"} for block in blocks)
+        assert blocks[0]["text"].startswith("You are CHICX Assistant")
+
+    def test_get_system_message_plain(self):
+        """Test that other models get the prompt as a plain string."""
+        message = get_system_message("whatsapp", "openai/gpt-4o-mini")
+        assert message == {"role": "system", "content": WHATSAPP_SYSTEM_PROMPT}
+
+    def test_get_system_message_reuses_content(self):
+        """Test that the static content is built once and shared."""
+        first = get_system_message("whatsapp", "anthropic/claude-3.5-haiku")
+        second = get_system_message("whatsapp", "anthropic/claude-3.5-haiku")
+        assert first is not second
+        assert first["content"] is second["content"]
+        assert isinstance(first["content"], tuple)
+
+    def test_get_prompt_cache_key(self):
+        """Test that cache keys are stable and distinct per channel."""
+        key = get_prompt_cache_key("whatsapp")
+        assert key == get_prompt_cache_key()
+        assert key.startswith("chicx-whatsapp-")
+        assert get_prompt_cache_key("voice") != key
+
+    def test_build_messages_static_prefix(self):
+        """Test that the system prompt leads and dynamic turns follow."""
+        history = [
+            {"role": "user", "content": "hi"},
+            {"role": "assistant", "content": "Hello!"},
+        ]
+        messages = build_messages("whatsapp", "openai/gpt-4o-mini", history, "track order")
+
+        assert messages[0] == {"role": "system", "content": WHATSAPP_SYSTEM_PROMPT}
+        assert messages[1:3] == history
+        assert messages[-1] == {"role": "user", "content": "track order"}
+
 
 @pytest.mark.unit
 class TestErrorResponses:
@@ -62,6 +108,11 @@ class TestErrorResponses:
         response = get_error_response("product_not_found", "invalid_lang")
         assert len(response) > 0  # Should fallback to English
 
+    def test_get_error_response_invalid_type_keeps_language(self):
+        """Test that the general error fallback stays in the requested language."""
+        response = get_error_response("invalid_error_type", "hinglish")
+        assert response == ERROR_RESPONSES["general_error"]["hinglish"]
+
 
 @pytest.mark.unit
 class TestOrderStatusDescriptions:
@@ -1,8 +1,12 @@
 """Unit tests for tools module."""
 
+import orjson
 import pytest
 from app.core.tools import (
     get_tool_definitions,
+    get_tool_definitions_json,
+    get_tool_by_name,
+    get_tool_names,
     validate_tool_arguments,
     ToolName,
 )
@@ -12,11 +16,25 @@ from app.core.tools import (
 class TestToolDefinitions:
     """Test tool definition functions."""
 
-    def test_get_tool_definitions_returns_list(self):
-        """Test that get_tool_definitions returns a list."""
+    def test_get_tool_definitions_returns_shared_tuple(self):
+        """Test that get_tool_definitions returns the same read-only tuple."""
         tools = get_tool_definitions()
-        assert isinstance(tools, list)
+        assert isinstance(tools, tuple)
         assert len(tools) > 0
+        assert get_tool_definitions() is tools
+
+    def test_get_tool_definitions_copy(self):
+        """Test that copy=True returns a fresh mutable list."""
+        tools = get_tool_definitions(copy=True)
+        assert isinstance(tools, list)
+        assert tools == list(get_tool_definitions())
+        assert get_tool_definitions(copy=True) is not tools
+
+    def test_get_tool_definitions_json(self):
+        """Test that the pre-encoded JSON matches the definitions."""
+        encoded = get_tool_definitions_json()
+        assert encoded is get_tool_definitions_json()
+        assert orjson.loads(encoded) == list(get_tool_definitions())
 
     def test_get_tool_definitions_structure(self):
         """Test tool definition structure."""
@@ -148,3 +166,19 @@ class TestToolName:
         # ToolName is a string literal type, not an enum, so we check the constant values
         assert ToolName.SEARCH_PRODUCTS == "search_products"
         assert ToolName.GET_PRODUCT_DETAILS == "get_product_details"
+
+
+@pytest.mark.unit
+class TestToolLookup:
+    """Test tool lookup by name."""
+
+    def test_get_tool_by_name(self):
+        """Test lookup of known and unknown tools."""
+        tool = get_tool_by_name(ToolName.SEARCH_FAQ)
+        assert tool["function"]["name"] == "search_faq"
+        assert get_tool_by_name("invalid_tool") is None
+
+    def test_get_tool_names_matches_definitions(self):
+        """Test that names follow definition order."""
+        names = get_tool_names()
+        assert names == tuple(t["function"]["name"] for t in get_tool_definitions())
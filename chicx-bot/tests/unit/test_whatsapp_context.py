@@ -0,0 +1,96 @@
+"""Unit tests for WhatsApp conversation context storage."""
+
+import orjson
+import pytest
+from redis.exceptions import WatchError
+
+from app.services.whatsapp import WhatsAppService
+
+
+class _FakePipeline:
+    """Minimal WATCH/MULTI pipeline over a dict, with an injectable conflict."""
+
+    def __init__(self, store: dict[str, bytes], conflict: bytes | None = None) -> None:
+        self._store = store
+        self._conflict = conflict
+        self._pending: tuple[str, bytes] | None = None
+        self.attempts = 0
+
+    async def __aenter__(self) -> "_FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        return None
+
+    async def watch(self, key: str) -> None:
+        self.attempts += 1
+
+    async def get(self, key: str) -> bytes | None:
+        return self._store.get(key)
+
+    def multi(self) -> None:
+        pass
+
+    def setex(self, key: str, ttl: int, value: bytes) -> None:
+        self._pending = (key, value)
+
+    async def execute(self) -> None:
+        key, value = self._pending
+        if self._conflict is not None:
+            # Another delivery wrote the key between our WATCH and EXEC
+            self._store[key] = self._conflict
+            self._conflict = None
+            raise WatchError()
+        self._store[key] = value
+
+
+class _FakeRedis:
+    def __init__(self, pipeline: _FakePipeline) -> None:
+        self._pipeline = pipeline
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        return self._pipeline
+
+
+def _service(pipeline: _FakePipeline) -> WhatsAppService:
+    service = WhatsAppService.__new__(WhatsAppService)
+    service._redis = _FakeRedis(pipeline)
+    return service
+
+
+@pytest.mark.unit
+@pytest.mark.whatsapp
+class TestAppendToContext:
+    """Test atomic context appends."""
+
+    async def test_appends_to_stored_context(self):
+        """Test that new turns are appended to what is stored."""
+        store = {"wa:context:919876543210": orjson.dumps([{"role": "user", "content": "hi"}])}
+        pipeline = _FakePipeline(store)
+
+        await _service(pipeline).append_to_context(
+            "919876543210", [{"role": "assistant", "content": "Hello!"}]
+        )
+
+        assert orjson.loads(store["wa:context:919876543210"]) == [
+            {"role": "user", "content": "hi"},
+            {"role": "assistant", "content": "Hello!"},
+        ]
+
+    async def test_concurrent_write_is_kept(self):
+        """Test that a conflicting write is re-read rather than overwritten."""
+        other_turns = [
+            {"role": "user", "content": "track order"},
+            {"role": "assistant", "content": "It has shipped."},
+        ]
+        store: dict[str, bytes] = {}
+        pipeline = _FakePipeline(store, conflict=orjson.dumps(other_turns))
+
+        await _service(pipeline).append_to_context(
+            "919876543210", [{"role": "user", "content": "return policy?"}]
+        )
+
+        assert pipeline.attempts == 2
+        assert orjson.loads(store["wa:context:919876543210"]) == other_turns + [
+            {"role": "user", "content": "return policy?"},
+        ]
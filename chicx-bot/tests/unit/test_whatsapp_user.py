@@ -0,0 +1,61 @@
+"""Unit tests for WhatsApp user lookup."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.whatsapp import WhatsAppService
+
+
+def _service(db: MagicMock) -> WhatsAppService:
+    service = WhatsAppService.__new__(WhatsAppService)
+    service._db = db
+    return service
+
+
+def _result(row: object | None) -> MagicMock:
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = row
+    result.scalar_one.return_value = row
+    return result
+
+
+@pytest.mark.unit
+@pytest.mark.whatsapp
+class TestGetOrCreateUser:
+    """Test get_or_create_user."""
+
+    async def test_existing_user_not_written(self):
+        """Test that a known phone is read without an INSERT."""
+        user = SimpleNamespace(phone="919876543210")
+        db = MagicMock()
+        db.scalar = AsyncMock(return_value=user)
+        db.execute = AsyncMock()
+
+        assert await _service(db).get_or_create_user("+919876543210") is user
+        db.execute.assert_not_awaited()
+
+    async def test_new_user_inserted(self):
+        """Test that an unknown phone is inserted with ON CONFLICT DO NOTHING."""
+        user = SimpleNamespace(phone="919876543210")
+        db = MagicMock()
+        db.scalar = AsyncMock(return_value=None)
+        db.execute = AsyncMock(return_value=_result(user))
+
+        assert await _service(db).get_or_create_user("919876543210") is user
+        insert_stmt = db.execute.await_args.args[0]
+        assert "ON CONFLICT (phone) DO NOTHING" in str(
+            insert_stmt.compile(dialect=postgresql.dialect())
+        )
+
+    async def test_concurrent_insert_reads_existing_row(self):
+        """Test that losing the insert race falls back to a SELECT."""
+        user = SimpleNamespace(phone="919876543210")
+        db = MagicMock()
+        db.scalar = AsyncMock(return_value=None)
+        db.execute = AsyncMock(side_effect=[_result(None), _result(user)])
+
+        assert await _service(db).get_or_create_user("919876543210") is user
+        assert db.execute.await_count == 2